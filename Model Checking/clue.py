@@ -21,12 +21,14 @@ symbols = characters + rooms + weapons
 
 
 def check_knowledge(knowledge):
-    for symbol in symbols:
-        if model_check(knowledge, symbol):
+    results = model_check_many(knowledge, symbols)
+    probabilities = marginals(knowledge)
+    for symbol, result in zip(symbols, results):
+        if result == YES:
             # termcolor.cprint(f"{symbol}: YES", "green")
             print(f"{symbol}: YES")
-        elif not model_check(knowledge, Not(symbol)):
-            print(f"{symbol}: MAYBE")
+        elif result == MAYBE:
+            print(f"{symbol}: MAYBE ({probabilities[symbol.name]:.0%})")
 
 
 # There must be a person, room, and weapon.
@@ -1,19 +1,197 @@
+import functools
 import itertools
+import multiprocessing
+import weakref
+
+from sat import ModelCounter, Solver
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Above this many symbols, model_check uses the SAT engine by default
+SAT_THRESHOLD = 12
+
+# The vectorized engine evaluates 2 ** CHUNK_BITS models at a time
+CHUNK_BITS = 16
+
+# Each process of a parallel model check gets about this many shards
+SHARDS_PER_PROCESS = 4
+
+# Results of model_check_many
+YES = "YES"
+NO = "NO"
+MAYBE = "MAYBE"
+
+
+class EvaluationException(Exception):
+    pass
+
+
+def cached(slot):
+    """
+    Caches the result of a sentence method in the given slot.
+    Caches of sentences that contain an And are dropped whenever
+    any And grows, since their value may depend on it.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self):
+            if (self._generation is not None
+                    and self._generation != Sentence.generation):
+                self._clear()
+            value = getattr(self, slot)
+            if value is None:
+                value = method(self)
+                object.__setattr__(self, slot, value)
+            return value
+        return wrapper
+    return decorator
 
 
 class Sentence():
 
+    # Sentences are immutable (apart from And.add) and hash-consed:
+    # building a sentence equal to an existing one returns that object
+    __slots__ = ("_hash", "_symbols", "_formula", "_generation", "__weakref__")
+    _interned = weakref.WeakValueDictionary()
+
+    # Incremented whenever an And grows
+    generation = 0
+
+    @classmethod
+    def _node(cls, key, pure, **fields):
+        """
+        Returns the interned sentence for key, creating it with the given
+        fields if needed. Sentences that are not pure (they contain an And)
+        keep their caches only until the next And grows.
+
+        A pure sentence is equal only to itself, so the hash of its key
+        serves as its hash. Its operands were hashed when they were built,
+        so the hash is cached here, bottom-up, without recursing deeply.
+        """
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for field, value in fields.items():
+                object.__setattr__(sentence, field, value)
+            object.__setattr__(sentence, "_generation",
+                               None if pure else Sentence.generation)
+            sentence._clear()
+            if pure:
+                object.__setattr__(sentence, "_hash", hash(key))
+            Sentence._interned[key] = sentence
+        return sentence
+
+    @staticmethod
+    def _key(sentence):
+        """
+        Identifies an operand in the key of an interned sentence.
+        Operands that contain an And may change as it grows, so they are
+        identified by object rather than by structure.
+        """
+        if sentence._generation is not None:
+            return ("id", id(sentence))
+        return sentence
+
+    @staticmethod
+    def _pure(*sentences):
+        """Checks that sentences contain no And, so caches never expire."""
+        return all(sentence._generation is None for sentence in sentences)
+
+    def _clear(self):
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_symbols", None)
+        object.__setattr__(self, "_formula", None)
+        if self._generation is not None:
+            object.__setattr__(self, "_generation", Sentence.generation)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("logical sentences are immutable")
+
+    def operands(self):
+        """Returns the sentences the logical sentence is built from."""
+        return ()
+
+    def _hash_operands(self):
+        """
+        Caches the hashes of all the operands of the sentence, deepest
+        first, so that hashing a deep sentence does not recurse deeply.
+        """
+        pending = []
+        stack = list(self.operands())
+        while stack:
+            sentence = stack.pop()
+            if sentence._hash is None or (
+                sentence._generation is not None
+                and sentence._generation != Sentence.generation
+            ):
+                pending.append(sentence)
+                stack.extend(sentence.operands())
+        for sentence in reversed(pending):
+            hash(sentence)
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave symbols
+        unassigned. Returns None if the value depends on those symbols.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols):
+        """
+        Compiles the logical sentence into a function of a bit-packed model,
+        an integer whose bit i holds the value of symbols[i].
+        Sentences too deeply nested for Python's parser are evaluated on
+        each call instead.
+        """
+        index = {name: i for i, name in enumerate(symbols)}
+        try:
+            return eval(f"lambda model: {self.source(index)}")
+        except (SyntaxError, MemoryError, RecursionError):
+            pass
+
+        def check(model):
+            return self.evaluate(
+                {name: model >> i & 1 for name, i in index.items()}
+            )
+        return check
+
+    def source(self, index):
+        """Returns a Python expression evaluating the logical sentence."""
+        raise Exception("nothing to compile")
+
+    def vectorize(self, symbols):
+        """
+        Compiles the logical sentence into a function of NumPy columns,
+        where columns[i] holds the values of symbols[i] across many models.
+        """
+        index = {name: i for i, name in enumerate(symbols)}
+        try:
+            return eval(f"lambda columns: {self.vector_source(index)}")
+        except (SyntaxError, MemoryError, RecursionError):
+            return lambda columns: vector_evaluate(self, columns, index)
+
+    def vector_source(self, index):
+        """Returns a NumPy expression evaluating the logical sentence."""
+        raise Exception("nothing to compile")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns a (cached) frozenset of all symbols in the sentence."""
+        return frozenset()
 
     @classmethod
     def validate(cls, sentence):
@@ -43,13 +221,20 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls._node(("symbol", name), True, name=name)
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
+    @cached("_hash")
     def __hash__(self):
         return hash(("symbol", self.name))
 
@@ -62,22 +247,51 @@ class Symbol(Sentence):
         except KeyError:
             raise EvaluationException(f"variable {self.name} not in model")
 
+    def partial(self, model):
+        return model.get(self.name)
+
+    def source(self, index):
+        try:
+            return f"(model >> {index[self.name]} & 1)"
+        except KeyError:
+            raise EvaluationException(f"variable {self.name} not in model")
+
+    def vector_source(self, index):
+        try:
+            return f"columns[{index[self.name]}]"
+        except KeyError:
+            raise EvaluationException(f"variable {self.name} not in model")
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    @cached("_symbols")
+    def symbol_set(self):
+        return frozenset([self.name])
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        return cls._node(("not", Sentence._key(operand)),
+                         Sentence._pure(operand), operand=operand)
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
+
+    def operands(self):
+        return (self.operand,)
 
+    @cached("_hash")
     def __hash__(self):
+        self._hash_operands()
         return hash(("not", hash(self.operand)))
 
     def __repr__(self):
@@ -86,23 +300,53 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def partial(self, model):
+        value = self.operand.partial(model)
+        return None if value is None else not value
+
+    def source(self, index):
+        return f"(not {self.operand.source(index)})"
+
+    def vector_source(self, index):
+        return f"(~{self.operand.vector_source(index)})"
+
+    @cached("_formula")
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    @cached("_symbols")
+    def symbol_set(self):
+        return self.operand.symbol_set()
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+
+        # Conjunctions can grow, so each one is a new sentence
+        sentence = object.__new__(cls)
+        object.__setattr__(sentence, "conjuncts", list(conjuncts))
+        object.__setattr__(sentence, "_generation", Sentence.generation)
+        sentence._clear()
+        return sentence
+
+    def __reduce__(self):
+        return (And, tuple(self.conjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
+    def operands(self):
+        return tuple(self.conjuncts)
+
+    @cached("_hash")
     def __hash__(self):
+        self._hash_operands()
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
@@ -116,30 +360,72 @@ class And(Sentence):
     def add(self, conjunct):
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
+        Sentence.generation += 1
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.partial(model)
+            if value is False:
+                return False
+            elif value is None:
+                result = None
+        return result
+
+    def source(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.source(index) for conjunct in self.conjuncts
+        ) + ")"
+
+    def vector_source(self, index):
+        if not self.conjuncts:
+            return "np.True_"
+        return "(" + " & ".join(
+            conjunct.vector_source(index) for conjunct in self.conjuncts
+        ) + ")"
+
+    @cached("_formula")
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    @cached("_symbols")
+    def symbol_set(self):
+        return frozenset().union(
+            *[conjunct.symbol_set() for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        key = ("or",) + tuple(Sentence._key(d) for d in disjuncts)
+        return cls._node(key, Sentence._pure(*disjuncts), disjuncts=disjuncts)
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
+    def operands(self):
+        return self.disjuncts
+
+    @cached("_hash")
     def __hash__(self):
+        self._hash_operands()
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
@@ -151,29 +437,68 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.partial(model)
+            if value is True:
+                return True
+            elif value is None:
+                result = None
+        return result
+
+    def source(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.source(index) for disjunct in self.disjuncts
+        ) + ")"
+
+    def vector_source(self, index):
+        if not self.disjuncts:
+            return "np.False_"
+        return "(" + " | ".join(
+            disjunct.vector_source(index) for disjunct in self.disjuncts
+        ) + ")"
+
+    @cached("_formula")
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    @cached("_symbols")
+    def symbol_set(self):
+        return frozenset().union(
+            *[disjunct.symbol_set() for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        key = ("implies", Sentence._key(antecedent), Sentence._key(consequent))
+        return cls._node(key, Sentence._pure(antecedent, consequent),
+                         antecedent=antecedent, consequent=consequent)
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (isinstance(other, Implication)
+                                 and self.antecedent == other.antecedent
+                                 and self.consequent == other.consequent)
 
+    def operands(self):
+        return (self.antecedent, self.consequent)
+
+    @cached("_hash")
     def __hash__(self):
+        self._hash_operands()
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
     def __repr__(self):
@@ -183,81 +508,680 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def partial(self, model):
+        antecedent = self.antecedent.partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
+    def source(self, index):
+        antecedent = self.antecedent.source(index)
+        consequent = self.consequent.source(index)
+        return f"(not {antecedent} or {consequent})"
+
+    def vector_source(self, index):
+        antecedent = self.antecedent.vector_source(index)
+        consequent = self.consequent.vector_source(index)
+        return f"(~{antecedent} | {consequent})"
+
+    @cached("_formula")
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    @cached("_symbols")
+    def symbol_set(self):
+        return self.antecedent.symbol_set() | self.consequent.symbol_set()
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        key = ("biconditional", Sentence._key(left), Sentence._key(right))
+        return cls._node(key, Sentence._pure(left, right),
+                         left=left, right=right)
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (isinstance(other, Biconditional)
+                                 and self.left == other.left
+                                 and self.right == other.right)
+
+    def operands(self):
+        return (self.left, self.right)
 
+    @cached("_hash")
     def __hash__(self):
+        self._hash_operands()
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
-
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def partial(self, model):
+        left = self.left.partial(model)
+        right = self.right.partial(model)
+        if left is None or right is None:
+            return None
+        return left == right
+
+    def source(self, index):
+        left = self.left.source(index)
+        right = self.right.source(index)
+        return f"((not {left}) == (not {right}))"
+
+    def vector_source(self, index):
+        left = self.left.vector_source(index)
+        right = self.right.vector_source(index)
+        return f"(~({left} ^ {right}))"
+
+    @cached("_formula")
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    @cached("_symbols")
+    def symbol_set(self):
+        return self.left.symbol_set() | self.right.symbol_set()
+
+
+class CNF():
+    """
+    Clause database compiled from sentences by the Tseitin transformation.
+
+    Every symbol and every compound subformula is given an integer
+    variable, and clauses tie each subformula variable to its operands.
+    Subformulas are hashed by their operator and operand literals, so a
+    piece that occurs many times (or with its operands reordered) is
+    encoded only once.
+    """
+
+    def __init__(self):
+
+        # Maps symbol names to variables, and variables back to names
+        self.variables = dict()
+        self.names = dict()
+
+        # Clauses as lists of integer literals
+        self.clauses = []
+        self.num_vars = 0
+
+        # Maps (operator, operand literals) to the subformula's literal
+        self.cache = dict()
+
+    def new_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def symbol(self, name):
+        """Returns the variable of a symbol, creating it if needed."""
+        if name not in self.variables:
+            var = self.new_var()
+            self.variables[name] = var
+            self.names[var] = name
+        return self.variables[name]
+
+    def add(self, sentence):
+        """Asserts that a sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            literals = {self.literal(d) for d in sentence.disjuncts}
+            if not any(-lit in literals for lit in literals):
+                self.clauses.append(sorted(literals, key=abs))
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when sentence is true."""
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        elif isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        elif isinstance(sentence, And):
+            return self._and([self.literal(c) for c in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            return -self._and([-self.literal(d) for d in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            return -self._and([self.literal(sentence.antecedent),
+                                       -self.literal(sentence.consequent)])
+        elif isinstance(sentence, Biconditional):
+            return self._iff(self.literal(sentence.left),
+                             self.literal(sentence.right))
+        raise TypeError(f"cannot compile {sentence!r}")
+
+    def _and(self, literals):
+        """Returns the literal of the conjunction of literals."""
+        literals = sorted(set(literals), key=abs)
+        if any(-lit in literals for lit in literals):
+            return -self._true()
+        if len(literals) == 0:
+            return self._true()
+        if len(literals) == 1:
+            return literals[0]
+        key = ("and",) + tuple(literals)
+        if key not in self.cache:
+            x = self.new_var()
+            for lit in literals:
+                self.clauses.append([-x, lit])
+            self.clauses.append([x] + [-lit for lit in literals])
+            self.cache[key] = x
+        return self.cache[key]
+
+    def _iff(self, a, b):
+        """Returns the literal of a <=> b."""
+        if a == b:
+            return self._true()
+        if a == -b:
+            return -self._true()
+
+        # a <=> b has the same variable as -a <=> -b, negated for a <=> -b
+        sign = 1
+        if a < 0:
+            a, sign = -a, -sign
+        if b < 0:
+            b, sign = -b, -sign
+        key = ("iff", min(a, b), max(a, b))
+        if key not in self.cache:
+            x = self.new_var()
+            self.clauses.extend([
+                [-x, -a, b], [-x, a, -b], [x, a, b], [x, -a, -b]
+            ])
+            self.cache[key] = x
+        return sign * self.cache[key]
+
+    def _true(self):
+        """Returns a variable constrained to be true."""
+        key = ("true",)
+        if key not in self.cache:
+            x = self.new_var()
+            self.clauses.append([x])
+            self.cache[key] = x
+        return self.cache[key]
+
+
+class IncrementalKB():
+    """
+    Knowledge base backed by a SAT solver that lives as long as it does.
+
+    Sentences are compiled into the solver as they are added, and queries
+    are answered under assumptions, so clauses learned while answering
+    one query keep speeding up the next, even after more knowledge arrives.
+    """
+
+    def __init__(self, *sentences):
+        self.knowledge = And()
+        self.cnf = CNF()
+        self.solver = Solver()
+
+        # Number of CNF clauses already given to the solver
+        self.loaded = 0
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        self.knowledge.add(sentence)
+        self.cnf.add(sentence)
+        self._load()
+
+    def consistent(self):
+        """Checks if the knowledge base has a model."""
+        return self.solver.solve()
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        lit = self._literal(query)
+        return not self.solver.solve(assumptions=[-lit])
+
+    def check(self, query):
+        """Returns YES, NO or MAYBE for a query."""
+        return self.check_many([query])[0]
+
+    def check_many(self, queries):
+        """Returns YES, NO or MAYBE for each of the queries."""
+        literals = [self._literal(query) for query in queries]
+
+        # An inconsistent knowledge base entails everything
+        if not self.solver.solve():
+            return [YES] * len(literals)
+
+        def value(model, lit):
+            return model[abs(lit)] == (lit > 0)
+
+        # Each query is a candidate for the value it takes in a first model
+        models = [self.solver.model]
+        results = []
+        for lit in literals:
+            candidate = lit if value(models[0], lit) else -lit
+
+            # Another model with the opposite value rules the candidate out
+            if not all(value(model, candidate) for model in models):
+                results.append(MAYBE)
+            elif self.solver.solve(assumptions=[-candidate]):
+                models.append(self.solver.model)
+                results.append(MAYBE)
+            else:
+                results.append(YES if candidate == lit else NO)
+        return results
+
+    def _literal(self, query):
+        """
+        Compiles a query into a literal. Its definitional clauses do not
+        constrain the knowledge, so they stay loaded for later queries.
+        """
+        lit = self.cnf.literal(query)
+        self._load()
+        return lit
+
+    def _load(self):
+        """Gives the solver any clauses it has not seen yet."""
+        self.solver.ensure_vars(self.cnf.num_vars)
+        for clause in self.cnf.clauses[self.loaded:]:
+            self.solver.add_clause(clause)
+        self.loaded = len(self.cnf.clauses)
+
+
+def model_check(knowledge, query, engine=None, stats=None, processes=None):
+    """
+    Checks if knowledge base entails query.
+
+    `engine` selects the inference procedure:
+        "enumerate" checks every model of the symbols
+        "dpll" searches partial models for a counter-model, with pruning
+        "sat" checks that knowledge and not query is unsatisfiable
+        "vectorized" checks every model in chunks of NumPy arrays
+    By default, "sat" is used above SAT_THRESHOLD symbols.
+
+    If `processes` is given, models are enumerated by that many
+    worker processes (and the engine defaults to "enumerate").
+
+    If `stats` is a dict, stats["nodes"] is set to the number of
+    models, search nodes or solver decisions the engine went through.
+    """
+    if engine is None and processes is not None:
+        engine = "enumerate"
+    if engine is None:
+        symbols = set.union(knowledge.symbols(), query.symbols())
+        engine = "sat" if len(symbols) > SAT_THRESHOLD else "enumerate"
+    if processes is not None:
+        if engine != "enumerate":
+            raise ValueError("only the enumerate engine runs in processes")
+        return model_check_parallel(knowledge, query, processes, stats)
+    if engine == "enumerate":
+        return model_check_enumerate(knowledge, query, stats)
+    elif engine == "dpll":
+        return model_check_dpll(knowledge, query, stats)
+    elif engine == "sat":
+        return model_check_sat(knowledge, query, stats)
+    elif engine == "vectorized":
+        entailed, _ = model_check_vectorized(knowledge, query, stats=stats)
+        return entailed
+    raise ValueError(f"unknown engine {engine!r}")
+
+
+def model_check_many(knowledge, queries, engine=None):
+    """
+    Checks many queries against one knowledge base.
+
+    Returns a list with, for each query, YES if the knowledge base
+    entails it, NO if it entails its negation, and MAYBE otherwise.
+    `engine` is "enumerate" or "sat", chosen as in model_check.
+    """
+    queries = list(queries)
+    if engine is None:
+        symbols = set.union(knowledge.symbols(),
+                            *[query.symbols() for query in queries])
+        engine = "sat" if len(symbols) > SAT_THRESHOLD else "enumerate"
+    if engine == "enumerate":
+        return model_check_many_enumerate(knowledge, queries)
+    elif engine == "sat":
+        return model_check_many_sat(knowledge, queries)
+    raise ValueError(f"unknown engine {engine!r}")
+
+
+def model_check_many_enumerate(knowledge, queries):
+    """
+    Answers every query in a single pass over the models
+    of the knowledge base.
+    """
+    symbols = sorted(set.union(knowledge.symbols(),
+                               *[query.symbols() for query in queries]))
+    knowledge_holds = knowledge.compile(symbols)
+    checks = [query.compile(symbols) for query in queries]
+
+    # Keep track of the values each query takes in models of knowledge
+    seen_true = [False] * len(queries)
+    seen_false = [False] * len(queries)
+    for model in filter(knowledge_holds, range(2 ** len(symbols))):
+        for i, check in enumerate(checks):
+            if check(model):
+                seen_true[i] = True
+            else:
+                seen_false[i] = True
+        if all(seen_true) and all(seen_false):
+            break
+
+    return [MAYBE if true and false else NO if false else YES
+            for true, false in zip(seen_true, seen_false)]
+
+
+def count_models(knowledge):
+    """
+    Returns the number of models of the knowledge base over its symbols,
+    counted without enumerating them.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+
+    # Tseitin variables are determined by the symbols, so they add no models
+    variables = range(1, cnf.num_vars + 1)
+    return ModelCounter().count(cnf.clauses, variables)
+
+
+def marginals(knowledge):
+    """
+    Returns, for each symbol of the knowledge base, the fraction of
+    its models in which the symbol is true.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    variables = range(1, cnf.num_vars + 1)
+    total, true = ModelCounter().marginals(cnf.clauses, variables)
+    if total == 0:
+        raise ValueError("knowledge base has no models")
+    return {name: true[var] / total for name, var in cnf.variables.items()}
+
+
+def model_check_many_sat(knowledge, queries):
+    """
+    Answers every query by computing which query values are forced
+    in all models of the knowledge base (its backbone).
+    """
+    return IncrementalKB(knowledge).check_many(queries)
+
+
+def model_check_sat(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query by showing that
+    knowledge and the negation of query have no model.
+    """
+    kb = IncrementalKB(knowledge)
+    entailed = kb.entails(query)
+    if stats is not None:
+        stats["nodes"] = kb.solver.decisions
+    return entailed
+
+
+def model_check_enumerate(knowledge, query, stats=None):
+    """Checks if knowledge base entails query."""
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Compile a check that is true exactly on models where knowledge holds
+    # but query does not, then look for one among all bit-packed models
+    counter_model = And(knowledge, Not(query)).compile(symbols)
+    found = next(filter(counter_model, range(2 ** len(symbols))), None)
+    if stats is not None:
+        stats["nodes"] = 2 ** len(symbols) if found is None else found + 1
+    return found is None
+
+
+def model_check_parallel(knowledge, query, processes, stats=None):
+    """
+    Checks if knowledge base entails query by enumerating models in a
+    pool of worker processes.
+
+    Fixing the values of the highest symbols splits the bit-packed models
+    into contiguous ranges, which the workers check independently. Each
+    worker compiles the sentence once, and the pool is stopped as soon
+    as any worker finds a counter-model.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    total = 2 ** len(symbols)
+
+    # Split the models into ranges of equal (power of two) size
+    shards = 1
+    while shards < processes * SHARDS_PER_PROCESS and shards < total:
+        shards *= 2
+    size = total // shards
+    ranges = [(start, start + size) for start in range(0, total, size)]
+
+    nodes = 0
+    found = None
+    pool = multiprocessing.Pool(
+        processes, initializer=_init_worker,
+        initargs=(And(knowledge, Not(query)), symbols)
+    )
+    try:
+        for (start, stop), counter_model in pool.imap_unordered(
+            _check_range, ranges
+        ):
+            if counter_model is None:
+                nodes += stop - start
+            else:
+                nodes += counter_model - start + 1
+                found = counter_model
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+
+    if stats is not None:
+        stats["nodes"] = nodes
+    return found is None
+
+
+# Compiled counter-model check of a model_check_parallel worker
+_worker_check = None
+
+
+def _init_worker(sentence, symbols):
+    global _worker_check
+    _worker_check = sentence.compile(symbols)
+
+
+def _check_range(bounds):
+    """Returns bounds, and the first counter-model in them or None."""
+    start, stop = bounds
+    return bounds, next(filter(_worker_check, range(start, stop)), None)
+
+
+def model_check_dpll(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query by searching partial models
+    for one where knowledge holds and query does not.
+
+    Branches are cut as soon as a constraint is false, forced symbols
+    are assigned by unit propagation and pure literal elimination,
+    and the search branches on the symbol in the most open constraints.
+    """
+
+    # Constraints a counter-model must satisfy
+    constraints = (list(knowledge.conjuncts) if isinstance(knowledge, And)
+                   else [knowledge])
+    constraints.append(Not(query))
+    nodes = 0
+
+    def unit(sentence, model):
+        """Returns the (symbol, value) a constraint forces, or None."""
+        if isinstance(sentence, Symbol):
+            return (sentence.name, True)
+        elif isinstance(sentence, Not):
+            if isinstance(sentence.operand, Symbol):
+                return (sentence.operand.name, False)
+            elif isinstance(sentence.operand, Not):
+                return unit(sentence.operand.operand, model)
+        elif isinstance(sentence, Or):
+            open_disjuncts = [disjunct for disjunct in sentence.disjuncts
+                              if disjunct.partial(model) is None]
+            if len(open_disjuncts) == 1:
+                return unit(open_disjuncts[0], model)
+        elif isinstance(sentence, Implication):
+            antecedent = Not(sentence.antecedent)
+            return unit(Or(antecedent, sentence.consequent), model)
+        return None
+
+    def polarities(sentence, positive, model, signs):
+        """Records the signs with which unassigned symbols occur."""
+        if isinstance(sentence, Symbol):
+            if sentence.name not in model:
+                signs.setdefault(sentence.name, set()).add(positive)
+        elif isinstance(sentence, Not):
+            polarities(sentence.operand, not positive, model, signs)
+        elif isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                polarities(conjunct, positive, model, signs)
+        elif isinstance(sentence, Or):
+            for disjunct in sentence.disjuncts:
+                polarities(disjunct, positive, model, signs)
+        elif isinstance(sentence, Implication):
+            polarities(sentence.antecedent, not positive, model, signs)
+            polarities(sentence.consequent, positive, model, signs)
+        elif isinstance(sentence, Biconditional):
+            for side in [sentence.left, sentence.right]:
+                polarities(side, True, model, signs)
+                polarities(side, False, model, signs)
+
+    def search(model):
+        """Checks if some extension of the partial model is a counter-model."""
+        nonlocal nodes
+        nodes += 1
+
+        while True:
+
+            # Cut off if any constraint is false, succeed if all are true
+            open_constraints = []
+            for constraint in constraints:
+                value = constraint.partial(model)
+                if value is False:
+                    return False
+                elif value is None:
+                    open_constraints.append(constraint)
+            if not open_constraints:
+                return True
+
+            # Assign a symbol forced by a unit constraint
+            forced = None
+            for constraint in open_constraints:
+                forced = unit(constraint, model)
+                if forced is not None:
+                    break
+            if forced is not None:
+                model[forced[0]] = forced[1]
+                continue
+
+            # Assign symbols that occur with only one sign
+            signs = dict()
+            for constraint in open_constraints:
+                polarities(constraint, True, model, signs)
+            pure = {name: sign.pop() for name, sign in signs.items()
+                    if len(sign) == 1}
+            if pure:
+                model.update(pure)
+                continue
+            break
+
+        # Branch on the symbol that occurs in the most open constraints
+        occurrences = dict()
+        for constraint in open_constraints:
+            for name in constraint.symbols():
+                if name not in model:
+                    occurrences[name] = occurrences.get(name, 0) + 1
+        p = max(sorted(occurrences), key=occurrences.get)
+        return (search({**model, p: True}) or
+                search({**model, p: False}))
+
+    found = search(dict())
+    if stats is not None:
+        stats["nodes"] = nodes
+    return not found
+
+
+def model_check_vectorized(knowledge, query, chunk_bits=CHUNK_BITS,
+                           stats=None):
+    """
+    Checks if knowledge base entails query by evaluating both on
+    NumPy boolean columns, 2 ** chunk_bits models at a time.
+
+    Returns whether the query is entailed, and the number of models
+    in which the knowledge base is true.
+    """
+    if np is None:
+        raise ImportError("the vectorized engine requires numpy")
+
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge_columns = knowledge.vectorize(symbols)
+    query_columns = query.vectorize(symbols)
+
+    # The low symbols vary within a chunk, the high ones are fixed per chunk
+    low = min(len(symbols), chunk_bits)
+    offsets = np.arange(2 ** low)
+    columns = [(offsets >> i & 1).astype(bool) for i in range(low)]
+    columns += [None] * (len(symbols) - low)
+
+    entailed = True
+    count = 0
+    for chunk in range(2 ** (len(symbols) - low)):
+        for i in range(low, len(symbols)):
+            columns[i] = np.bool_(chunk >> (i - low) & 1)
+
+        # Count models of the knowledge base, and look for a counter-model
+        holds = np.broadcast_to(knowledge_columns(columns), offsets.shape)
+        count += int(np.count_nonzero(holds))
+        if entailed and np.any(holds & ~query_columns(columns)):
+            entailed = False
+
+    if stats is not None:
+        stats["nodes"] = 2 ** len(symbols)
+    return entailed, count
+
+
+def vector_evaluate(sentence, columns, index):
+    """
+    Evaluates a sentence on NumPy columns, where columns[index[name]]
+    holds the values of a symbol; used for sentences too deeply nested
+    to vectorize.
+    """
+    if isinstance(sentence, Symbol):
+        try:
+            return columns[index[sentence.name]]
+        except KeyError:
+            raise EvaluationException(f"variable {sentence.name} not in model")
+    elif isinstance(sentence, Not):
+        return ~vector_evaluate(sentence.operand, columns, index)
+    elif isinstance(sentence, And):
+        result = np.True_
+        for conjunct in sentence.conjuncts:
+            result = result & vector_evaluate(conjunct, columns, index)
+        return result
+    elif isinstance(sentence, Or):
+        result = np.False_
+        for disjunct in sentence.disjuncts:
+            result = result | vector_evaluate(disjunct, columns, index)
+        return result
+    elif isinstance(sentence, Implication):
+        return (~vector_evaluate(sentence.antecedent, columns, index)
+                | vector_evaluate(sentence.consequent, columns, index))
+    elif isinstance(sentence, Biconditional):
+        return ~(vector_evaluate(sentence.left, columns, index)
+                 ^ vector_evaluate(sentence.right, columns, index))
+    raise TypeError(f"cannot evaluate {sentence!r}")
@@ -51,6 +51,7 @@ knowledge.add(And(
     Not(Symbol("yellow3"))
 ))
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
+results = model_check_many(knowledge, symbols)
+for symbol, result in zip(symbols, results):
+    if result == YES:
         print(symbol)
@@ -1,33 +1,40 @@
 # import itertools
+import copy
+import math
 import random
+import time
+
+import numpy as np
 
 
 class Minesweeper:
     """
     Minesweeper game representation
+
+    The board is a boolean NumPy array of mines, and the number of mines
+    around every cell is computed once, when the board is created.
     """
 
     def __init__(self, height=8, width=8, mines=8):
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        # Add mines randomly: the first cells of a random permutation,
+        # drawn from a generator seeded by the random module so that
+        # seeding random still reproduces the board
+        rng = np.random.default_rng(random.getrandbits(64))
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[rng.permutation(height * width)[:mines]] = True
+        rows, cols = np.nonzero(self.board)
+        self.mines = set(zip(rows.tolist(), cols.tolist()))
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Count the mines around each cell by convolving the board with
+        # a 3x3 kernel of ones (in two 1D passes), minus the cell itself
+        padded = np.pad(self.board.astype(np.uint8), 1)
+        columns = padded[:-2] + padded[1:-1] + padded[2:]
+        self.counts = columns[:, :-2] + columns[:, 1:-1] + columns[:, 2:]
+        self.counts -= self.board
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -40,7 +47,7 @@ class Minesweeper:
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.is_mine((i, j)):
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -48,8 +55,7 @@ class Minesweeper:
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return bool(self.board[cell])
 
     def nearby_mines(self, cell):
         """
@@ -57,24 +63,7 @@ class Minesweeper:
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        return int(self.counts[cell])
 
     def won(self):
         """
@@ -88,20 +77,135 @@ class Sentence:
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Cells are bits of an integer: cell (i, j) is bit i * width + j.
+    The mask is stored shifted right by `offset`, its lowest bit, so it
+    stays a few words long even on large boards, and subset tests,
+    differences and counts are single integer operations.
+
+    Without a board width, the width is taken from the cells themselves,
+    so a sentence can be built about any cells. Sentences of different
+    widths are compared by their cells instead.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    def __init__(self, cells, count, width=None):
+        cells = set(cells)
+        if width is None:
+            width = 1 + max((cell[1] for cell in cells), default=0)
+        self.width = width
+        self.offset = 0
+        self.mask = 0
+        for cell in cells:
+            if cell[0] < 0 or not 0 <= cell[1] < width:
+                raise ValueError(f"cell {cell} outside board width {width}")
+            self.mask |= 1 << (cell[0] * width + cell[1])
+        self.normalize()
         self.count = count
         self.mines = set()
         self.safes = set()
 
+    @classmethod
+    def from_mask(cls, offset, mask, count, width):
+        """
+        Builds a sentence directly from a (shifted) mask.
+        """
+        sentence = cls((), count, width)
+        sentence.offset = offset
+        sentence.mask = mask
+        sentence.normalize()
+        return sentence
+
+    def normalize(self):
+        """
+        Shifts the mask so that its lowest bit is set.
+        """
+        if self.mask == 0:
+            self.offset = 0
+        else:
+            shift = (self.mask & -self.mask).bit_length() - 1
+            self.mask >>= shift
+            self.offset += shift
+
+    @property
+    def cells(self):
+        """
+        The set of cells in the sentence.
+        """
+        cells = set()
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            bit = self.offset + low.bit_length() - 1
+            cells.add(divmod(bit, self.width))
+            mask ^= low
+        return cells
+
+    def copy(self):
+        """
+        Returns a copy of the sentence, with copies of its known cells.
+        """
+        sentence = Sentence.from_mask(
+            self.offset, self.mask, self.count, self.width)
+        sentence.mines = set(self.mines)
+        sentence.safes = set(self.safes)
+        return sentence
+
+    def key(self):
+        """
+        Canonical key: equal sentences (on the same board) have equal keys.
+        """
+        return (self.offset, self.mask, self.count)
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __contains__(self, cell):
+        if not 0 <= cell[1] < self.width:
+            return False
+        shift = cell[0] * self.width + cell[1] - self.offset
+        return shift >= 0 and bool(self.mask >> shift & 1)
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        if self.width == other.width:
+            return self.key() == other.key()
+        return (self.count == other.count and len(self) == len(other)
+                and self.cells == other.cells)
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def aligned(self, other):
+        """
+        Returns other's mask shifted to line up with this sentence's mask
+        (bits of other below this sentence's offset are dropped).
+        """
+        if other.offset >= self.offset:
+            return other.mask << (other.offset - self.offset)
+        return other.mask >> (self.offset - other.offset)
+
+    def is_subset(self, other):
+        """
+        Checks if the cells of this sentence are a strict subset
+        of the cells of other.
+        """
+        if self.width != other.width:
+            return self.cells < other.cells
+        if self.offset < other.offset or len(self) >= len(other):
+            return False
+        return other.aligned(self) & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of this sentence that are
+        not in other, given that other's cells are a subset of them.
+        """
+        if self.width != other.width:
+            return Sentence(self.cells - other.cells,
+                            self.count - other.count, self.width)
+        mask = self.mask & ~self.aligned(other)
+        return Sentence.from_mask(self.offset, mask,
+                                  self.count - other.count, self.width)
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -114,16 +218,26 @@ class Sentence:
         """
         return self.safes
 
+    def remove(self, cell):
+        """
+        Removes a cell from the sentence, if it is in it.
+        Returns whether it was.
+        """
+        if cell not in self:
+            return False
+        self.mask &= ~(1 << (cell[0] * self.width + cell[1] - self.offset))
+        self.normalize()
+        return True
+
     def mark_mine(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        if self.remove(cell):
             self.count -= 1
             if self.count == 0:
-                for safe_cell in self.cells.copy():
+                for safe_cell in self.cells:
                     self.mark_safe(safe_cell)
         self.mines.add(cell)
 
@@ -132,24 +246,196 @@ class Sentence:
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
-            if self.count == len(self.cells):
-                for mine_cell in self.cells.copy():
+        if self.remove(cell):
+            if self.count == len(self):
+                for mine_cell in self.cells:
                     self.mark_mine(mine_cell)
         self.safes.add(cell)
 
 
+class LinearSystem:
+    """
+    Sentences as linear equations over cells that are 0 (safe) or 1 (mine)
+
+    Each row is a dict from cell to an integer coefficient, with a
+    right-hand side. Rows are kept in reduced row echelon form: every row
+    has a pivot cell that appears in no other row. Elimination is
+    fraction-free (rows are combined with integer multipliers and divided
+    by their gcd), so bound reasoning can use the coefficients directly.
+    """
+
+    def __init__(self):
+
+        # Rows by id: (coefficients, right-hand side)
+        self.rows = {}
+        self.next_id = 0
+
+        # Maps each row id to its pivot cell, and each pivot cell to its row
+        self.pivot = {}
+        self.pivot_row = {}
+
+        # Maps each cell to the ids of the rows containing it
+        self.columns = {}
+
+        # Rows changed since deductions were last collected
+        self.dirty = set()
+
+    def add(self, cells, count):
+        """
+        Adds the equation sum(cells) = count, reduced by the pivots
+        of the existing rows.
+        """
+        coefficients = dict.fromkeys(cells, 1)
+        rhs = count
+        for cell in cells:
+            if cell in self.pivot_row:
+                row = self.rows[self.pivot_row[cell]]
+                coefficients, rhs = self.combine(coefficients, rhs, *row, cell)
+        self.insert(coefficients, rhs)
+
+    def assign(self, cell, value):
+        """
+        Substitutes a known value (1 for a mine, 0 for safe) for a cell.
+        """
+        reinsert = []
+        for row_id in self.columns.pop(cell, set()):
+            coefficients, rhs = self.rows.pop(row_id)
+            pivot = self.pivot.pop(row_id)
+            del self.pivot_row[pivot]
+            self.dirty.discard(row_id)
+            coefficients = dict(coefficients)
+            rhs -= coefficients.pop(cell) * value
+            for other in coefficients:
+                self.columns[other].discard(row_id)
+            if pivot == cell:
+                reinsert.append((coefficients, rhs))
+            else:
+                self.store(row_id, coefficients, rhs, pivot)
+
+        # A row that lost its pivot needs a new one, which is eliminated
+        # from other rows: only do so once no row contains the cell
+        for coefficients, rhs in reinsert:
+            self.insert(coefficients, rhs)
+
+    def copy(self):
+        """
+        Returns a copy of the system. Rows are never changed in place,
+        so they are shared with the copy.
+        """
+        system = LinearSystem()
+        system.rows = dict(self.rows)
+        system.next_id = self.next_id
+        system.pivot = dict(self.pivot)
+        system.pivot_row = dict(self.pivot_row)
+        system.columns = {
+            cell: set(rows) for cell, rows in self.columns.items()
+        }
+        system.dirty = set(self.dirty)
+        return system
+
+    def insert(self, coefficients, rhs):
+        """
+        Adds a row that contains no pivot of another row, choosing as its
+        pivot the cell in the fewest rows and eliminating it elsewhere.
+        """
+        if not coefficients:
+            return
+        pivot = min(coefficients, key=lambda c: len(self.columns.get(c, ())))
+        for row_id in list(self.columns.get(pivot, ())):
+            other = self.rows.pop(row_id)
+            for cell in other[0]:
+                self.columns[cell].discard(row_id)
+            reduced = self.combine(*other, coefficients, rhs, pivot)
+            self.store(row_id, *reduced, self.pivot[row_id])
+        row_id = self.next_id
+        self.next_id += 1
+        self.store(row_id, coefficients, rhs, pivot)
+
+    def store(self, row_id, coefficients, rhs, pivot):
+        self.rows[row_id] = (coefficients, rhs)
+        self.pivot[row_id] = pivot
+        self.pivot_row[pivot] = row_id
+        for cell in coefficients:
+            self.columns.setdefault(cell, set()).add(row_id)
+        self.dirty.add(row_id)
+
+    @staticmethod
+    def combine(coefficients, rhs, other, other_rhs, cell):
+        """
+        Eliminates cell from a row using another row containing it.
+        """
+        a = other[cell]
+        b = coefficients[cell]
+        result = {c: a * v for c, v in coefficients.items()}
+        for c, v in other.items():
+            result[c] = result.get(c, 0) - b * v
+        result = {c: v for c, v in result.items() if v}
+        rhs = a * rhs - b * other_rhs
+        divisor = math.gcd(rhs, *result.values())
+        if divisor > 1:
+            result = {c: v // divisor for c, v in result.items()}
+            rhs //= divisor
+        return result, rhs
+
+    def deductions(self):
+        """
+        Returns (cell, is_mine) for the cells that bound reasoning
+        determines in the rows changed since the last call.
+
+        With every cell 0 or 1, a row's left-hand side lies between the
+        sum of its negative and the sum of its positive coefficients.
+        A cell is determined when one of its values would leave the
+        right-hand side outside the range of the remaining cells.
+        """
+        marks = []
+        for row_id in self.dirty:
+            if row_id not in self.rows:
+                continue
+            coefficients, rhs = self.rows[row_id]
+            low = sum(v for v in coefficients.values() if v < 0)
+            high = sum(v for v in coefficients.values() if v > 0)
+            for cell, v in coefficients.items():
+                if v > 0:
+                    if rhs > high - v:
+                        marks.append((cell, True))
+                    elif rhs < low + v:
+                        marks.append((cell, False))
+                else:
+                    if rhs < low - v:
+                        marks.append((cell, True))
+                    elif rhs > high + v:
+                        marks.append((cell, False))
+        self.dirty = set()
+        return marks
+
+
 class MinesweeperAI:
     """
     Minesweeper game player
+
+    Sentences in the knowledge base, and the dicts of sentences in the
+    index, are replaced rather than changed in place. A snapshot can
+    therefore share them all: it shares the AI's containers too, and
+    whichever side changes its knowledge first copies the containers
+    (not the sentences) at that point.
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, time_budget=0.1,
+                 inference="subset", node_budget=None):
 
-        # Set initial height and width
+        # Set initial height, width and total number of mines
         self.height = height
         self.width = width
+        self.total_mines = mines
+
+        # Seconds the exact solver may spend before falling back to sampling,
+        # and optionally the number of search nodes it may visit, which
+        # unlike time makes the same game play the same way every time
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+
+        # Solutions of frontier components, by their sentences' keys
+        self.solutions = {}
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -158,26 +444,222 @@ class MinesweeperAI:
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells neither chosen nor known to be mines, in an array from
+        # which cells are swap-removed, and each cell's position in it
+        self.unknown = [
+            (row, col) for row in range(height) for col in range(width)
+        ]
+        self.position = {cell: i for i, cell in enumerate(self.unknown)}
+
+        # Sentences about the game known to be true, by canonical key
+        self.knowledge = {}
+
+        # Maps each unknown cell to the sentences containing it, by key
+        self.index = {}
+
+        # Sentences added or changed since subset inference last ran
+        self.worklist = []
+
+        # Inference mode: "subset" compares sentences pairwise, "linear"
+        # eliminates over the sentences as a linear system
+        if inference not in ("subset", "linear"):
+            raise ValueError(f"unknown inference mode: {inference}")
+        self.inference = inference
+        self.system = LinearSystem() if inference == "linear" else None
+
+        # Whether the containers above are shared with a snapshot
+        self.shared = False
+
+    def snapshot(self):
+        """
+        Returns a copy of the AI, in O(1), that can be played on its own
+        or passed to restore to return to the current knowledge.
+        """
+        snapshot = copy.copy(self)
+        self.shared = snapshot.shared = True
+        return snapshot
+
+    def restore(self, snapshot):
+        """
+        Returns the AI, in O(1), to the knowledge of a snapshot.
+        The snapshot itself is left unchanged.
+        """
+        self.__dict__.update(snapshot.__dict__)
+        self.shared = snapshot.shared = True
+
+    def unshare(self):
+        """
+        Copies the containers shared with a snapshot, before changing them.
+        """
+        if not self.shared:
+            return
+        self.shared = False
+        self.moves_made = set(self.moves_made)
+        self.mines = set(self.mines)
+        self.safes = set(self.safes)
+        self.unknown = list(self.unknown)
+        self.position = dict(self.position)
+        self.knowledge = dict(self.knowledge)
+        self.index = dict(self.index)
+        self.worklist = list(self.worklist)
+        if self.system is not None:
+            self.system = self.system.copy()
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.propagate([(cell, True)])
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.propagate([(cell, False)])
+
+    def propagate(self, marks):
+        """
+        Applies a list of (cell, is_mine) marks to the sentences containing
+        each cell, then marks any cells those sentences come to determine.
+        """
+        self.unshare()
+        while marks:
+            cell, is_mine = marks.pop()
+            known = self.mines if is_mine else self.safes
+            if cell in known:
+                continue
+            known.add(cell)
+            if is_mine:
+                self.discard(cell)
+            if self.system is not None:
+                self.system.assign(cell, int(is_mine))
+
+            # Only sentences containing the cell can change;
+            # each is replaced by an updated copy
+            for sentence in self.index.pop(cell, {}).values():
+                old_key = sentence.key()
+                if self.knowledge.get(old_key) is not sentence:
+                    continue
+                del self.knowledge[old_key]
+                self.unindex(sentence)
+                sentence = sentence.copy()
+                if is_mine:
+                    sentence.mark_mine(cell)
+                else:
+                    sentence.mark_safe(cell)
+                for mine in sentence.known_mines() - self.mines:
+                    marks.append((mine, True))
+                for safe in sentence.known_safes() - self.safes:
+                    marks.append((safe, False))
+                self.add_sentence(sentence)
+
+    def discard(self, cell):
+        """
+        Removes a cell from the unknown cells, if it is there,
+        by moving the last unknown cell into its place.
+        """
+        i = self.position.pop(cell, None)
+        if i is None:
+            return
+        last = self.unknown.pop()
+        if last != cell:
+            self.unknown[i] = last
+            self.position[last] = i
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, indexes it by its cells and
+        queues it for subset inference. Empty and duplicate sentences
+        are dropped instead.
+        """
+        key = sentence.key()
+        if not len(sentence) or key in self.knowledge:
+            return
+        self.knowledge[key] = sentence
+        for cell in sentence.cells:
+            sentences = dict(self.index.get(cell, {}))
+            sentences[key] = sentence
+            self.index[cell] = sentences
+        self.worklist.append(sentence)
+
+    def unindex(self, sentence):
+        """
+        Removes a sentence from the index entries of its cells.
+        """
+        key = sentence.key()
+        for cell in sentence.cells:
+            if key in self.index.get(cell, {}):
+                sentences = dict(self.index[cell])
+                del sentences[key]
+                if sentences:
+                    self.index[cell] = sentences
+                else:
+                    del self.index[cell]
+
+    def infer(self):
+        """
+        Infers from the knowledge until nothing more follows.
+
+        In linear mode, the cells determined by the linear system are
+        marked as well. Bound reasoning on its rows depends on which
+        rows elimination happened to produce, so it finds cells subset
+        inference misses but can miss some that it finds; both are run.
+        """
+        self.infer_subsets()
+        if self.system is not None:
+            marks = self.system.deductions()
+            while marks:
+                self.propagate(marks)
+                self.infer_subsets()
+                marks = self.system.deductions()
+
+    def infer_subsets(self):
+        """
+        Subset inference: whenever a sentence's cells are a subset of
+        another's, the difference forms a new sentence. Only queued
+        sentences are compared, and only with sentences sharing a cell.
+        """
+        while self.worklist:
+            sentence = self.worklist.pop()
+            if self.knowledge.get(sentence.key()) is not sentence:
+                continue
+
+            # Sentences sharing a cell with this one
+            neighbors = {}
+            for cell in sentence.cells:
+                neighbors.update(self.index.get(cell, {}))
+            neighbors.pop(sentence.key())
+
+            for other in neighbors.values():
+                if self.knowledge.get(other.key()) is not other:
+                    continue
+                if sentence.is_subset(other):
+                    self.subtract(other, sentence)
+                elif other.is_subset(sentence):
+                    self.subtract(sentence, other)
+
+                # If this sentence changed, it was queued again
+                if self.knowledge.get(sentence.key()) is not sentence:
+                    break
+
+    def subtract(self, sentence_b, sentence_a):
+        """
+        Infers from sentence_a being a subset of sentence_b:
+        if b-a count is 0, update safes, not a new sentence
+        if b-a count == b-a, update mines, not a new sentence
+        otherwise add b-a as a sentence
+        """
+        new_sentence = sentence_b.difference(sentence_a)
+        if new_sentence.count == 0:
+            # found new safes
+            self.propagate([(cell, False) for cell in new_sentence.cells])
+        elif new_sentence.count == len(new_sentence):
+            # found new mines
+            self.propagate([(cell, True) for cell in new_sentence.cells])
+        else:
+            self.add_sentence(new_sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -196,7 +678,9 @@ class MinesweeperAI:
         """
 
         # add move as made and safe
+        self.unshare()
         self.moves_made.add(cell)
+        self.discard(cell)
         self.mark_safe(cell)
 
         '''
@@ -238,54 +722,20 @@ class MinesweeperAI:
                     self.mark_mine(cell)
             # 0 < count < number of cells, add sentence
             else:
-                self.knowledge.append(Sentence(new_cell_list, count))
-
-        # after processing the new input, update sentences with known mines and safes
-        for sentence in self.knowledge:
-            for mine in self.mines:
-                sentence.mark_mine(mine)
-            for safe in self.safes:
-                sentence.mark_safe(safe)
-        for sentence in self.knowledge:
-            self.mines.update(sentence.known_mines())
-            self.safes.update(sentence.known_safes())
+                self.add_sentence(Sentence(new_cell_list, count, self.width))
+                if self.system is not None:
+                    self.system.add(new_cell_list, count)
 
-        '''
-        Too add inferred sentences based on knowledge:
-        find: a subset of b, a != b, a not empty
-        generate new sentence: b-a
-        if b-a count is 0, update safes, not a new sentence
-        if b-a count == b-a, update mines, not a new sentence
-        if b-a already exists, skip new sentence        
-        '''
-        for sentence_a in self.knowledge.copy():
-            for sentence_b in self.knowledge.copy():
-                if (len(sentence_a.cells) > 0 and sentence_a.cells < sentence_b.cells):
-                    # a is subset of b, a != b, a not empty
-                    # print(f"reached subset of {sentence_a} in {sentence_b}")
-                    new_count = sentence_b.count - sentence_a.count
-                    new_cells = sentence_b.cells - sentence_a.cells
-                    new_sentence = Sentence(new_cells, new_count)
-
-                    if new_count == 0:
-                        # found new safes
-                        for safe_cell in new_cells:
-                            self.mark_safe(safe_cell)
-                    elif new_count == len(new_cells):
-                        # found new mines
-                        for mine_cell in new_cells:
-                            self.mark_mine(mine_cell)
-                    elif new_sentence not in self.knowledge:
-                        # found NEW sentence
-                        self.knowledge.append(new_sentence)
-                        # print(f"Sentence A: {sentence_a}")
-                        # print(f"Sentence B: {sentence_b}")
-                        # print(f"subsetting, total {len(self.knowledge)} sentences")
+        # known mines and safes were already applied to the sentences
+        # containing them when they were marked
+
+        # infer from the new sentence and the sentences that changed
+        self.infer()
 
         # print("\nAfter adding knowledge")
         # print(f"Mines: {self.mines}")
         # print(f"Unused safes: {self.safes - self.moves_made}")
-        # for sentence in self.knowledge:
+        # for sentence in self.knowledge.values():
         #     print(sentence)
 
     def make_safe_move(self):
@@ -311,15 +761,282 @@ class MinesweeperAI:
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        Among those, the cell least likely to be a mine is chosen,
+        with ties broken randomly. Returns None only when no such
+        cell is left.
+        """
+        if not self.unknown:
+            return None
+
+        # Without sentences all unknown cells are equally likely
+        if not self.knowledge:
+            return random.choice(self.unknown)
+
+        probabilities = self.probabilities()
+        if not probabilities:
+            return None
+        lowest = min(probabilities.values())
+        return random.choice([
+            cell for cell, probability in probabilities.items()
+            if probability == lowest
+        ])
+
+    def probabilities(self):
         """
-        # if found all mines and covered all other cells
-        if len(self.moves_made) + len(self.mines) == self.height * self.width:
+        Returns the probability of being a mine for every cell that has
+        not been chosen and is not known to be a mine.
+
+        The frontier (cells in some sentence) is split into components
+        that share no sentences, and the mine placements consistent with
+        each component are counted exactly by solve_component. Counts
+        are combined across components with the number of ways to place
+        the remaining mines among the other unknown cells, so the global
+        mine count is taken into account.
+        """
+        candidates = self.unknown
+
+        # Count placements per component, reusing unchanged components
+        solutions = {}
+        for sentences in self.components():
+            key = frozenset(sentence.key() for sentence in sentences)
+            if key in self.solutions:
+                solutions[key] = self.solutions[key]
+            else:
+                solutions[key] = solve_component(
+                    sentences, self.time_budget, node_budget=self.node_budget)
+        self.solutions = solutions
+        components = list(solutions.values())
+
+        # Unknown cells outside the frontier
+        frontier = set(self.index)
+        rest = [
+            cell for cell in candidates
+            if cell not in frontier and cell not in self.safes
+        ]
+        remaining = self.total_mines - len(self.mines)
+
+        # Ways to place k mines over all components, and over all but one
+        total = combine([ways for ways, _ in components])
+        others = [
+            combine([ways for ways, _ in components[:i] + components[i + 1:]])
+            for i in range(len(components))
+        ]
+
+        # Ways to place the remaining mines outside the frontier,
+        # given k mines in it
+        weight = {
+            k: math.comb(len(rest), remaining - k)
+            if 0 <= remaining - k <= len(rest) else 0
+            for k in total
+        }
+
+        # If the mine count fits no placement, weigh placements equally
+        if not any(ways * weight[k] for k, ways in total.items()):
+            weight = dict.fromkeys(total, 1)
+
+        norm = sum(ways * weight[k] for k, ways in total.items())
+        probabilities = {cell: 0.0 for cell in candidates}
+        if norm == 0:
+            return probabilities
+
+        # Frontier cells: mines in the cell's component times the rest
+        for (ways, counts), other in zip(components, others):
+            for cell, by_k in counts.items():
+                mines = sum(
+                    count * other_ways * weight[k + j]
+                    for k, count in by_k.items()
+                    for j, other_ways in other.items()
+                )
+                probabilities[cell] = mines / norm
+
+        # Other cells share the mines left over by the frontier
+        if rest:
+            mines = sum(
+                ways * weight[k] * min(max(remaining - k, 0), len(rest))
+                for k, ways in total.items()
+            )
+            for cell in rest:
+                probabilities[cell] = mines / norm / len(rest)
+        return probabilities
+
+    def components(self):
+        """
+        Splits the knowledge into groups of sentences
+        connected by shared cells.
+        """
+        seen = set()
+        components = []
+        for start in self.knowledge.values():
+            if id(start) in seen:
+                continue
+            seen.add(id(start))
+            component = [start]
+            for sentence in component:
+                for cell in sentence.cells:
+                    for other in self.index.get(cell, {}).values():
+                        if id(other) not in seen:
+                            seen.add(id(other))
+                            component.append(other)
+            components.append(component)
+        return components
+
+
+class OutOfTime(Exception):
+    """
+    Raised when exact counting runs past its deadline or node budget.
+    """
+
+
+def solve_component(sentences, time_budget, samples=1000, node_budget=None):
+    """
+    Counts the mine placements consistent with a list of sentences.
+
+    Returns (ways, counts) where ways maps a number of mines k to the
+    number of placements with k mines, and counts maps each cell to
+    a dict from k to the number of those placements with a mine in it.
+
+    Cells are assigned in order by backtracking, and the result for
+    the remaining cells is memoized by the position and the number of
+    mines each sentence still needs. If that takes longer than time_budget
+    seconds, or visits more than node_budget search nodes, up to `samples`
+    placements are sampled within another time_budget instead, and counted
+    as if they were all of them.
+    """
+    cells, member, left = constraints(sentences)
+    need = tuple(sentence.count for sentence in sentences)
+    deadline = time.perf_counter() + time_budget
+    try:
+        ways, counts = count_placements(
+            cells, member, left, need, deadline, node_budget)
+    except (OutOfTime, RecursionError):
+        ways, counts = {}, [{} for cell in cells]
+        end = time.perf_counter() + time_budget
+        for _ in range(samples):
+            placement = sample_placement(cells, member, left, need)
+            k = sum(placement)
+            ways[k] = ways.get(k, 0) + 1
+            for i, mine in enumerate(placement):
+                if mine:
+                    counts[i][k] = counts[i].get(k, 0) + 1
+            if time.perf_counter() > end:
+                break
+    return ways, dict(zip(cells, counts))
+
+
+def constraints(sentences):
+    """
+    Orders the cells of sentences so that neighbors are close, and returns
+    them with the sentences containing each cell (by position in
+    sentences) and, per sentence, the number of its cells after each cell.
+    """
+    cells = []
+    seen = set()
+    for sentence in sentences:
+        for cell in sorted(sentence.cells):
+            if cell not in seen:
+                seen.add(cell)
+                cells.append(cell)
+    position = {cell: i for i, cell in enumerate(cells)}
+    member = [[] for cell in cells]
+    left = []
+    for s, sentence in enumerate(sentences):
+        after = [0] * len(cells)
+        for cell in sentence.cells:
+            member[position[cell]].append(s)
+            for i in range(position[cell]):
+                after[i] += 1
+        left.append(after)
+    return cells, member, left
+
+
+def assign(need, member, left, i, mine):
+    """
+    Returns the needs of the sentences after cell i is assigned,
+    or None if some sentence can no longer be satisfied.
+    """
+    need = list(need)
+    for s in member[i]:
+        need[s] -= mine
+        if not 0 <= need[s] <= left[s][i]:
             return None
-        count = 0
-        while count < 20:  # TODO implement using a set of all cells
-            row = random.randrange(self.height)
-            col = random.randrange(self.width)
-            if ((row, col) not in self.moves_made and
-                    (row, col) not in self.mines):
-                return (row, col)
-            count += 1
+    return tuple(need)
+
+
+def count_placements(cells, member, left, need, deadline, node_budget=None):
+    """
+    Counts placements over cells satisfying the sentence needs exactly.
+    Returns (ways, counts) as in solve_component, with counts a list.
+    """
+    memo = {}
+
+    def search(i, need):
+        if i == len(cells):
+            return {0: (1, ())}
+        if (i, need) in memo:
+            return memo[i, need]
+        if time.perf_counter() > deadline:
+            raise OutOfTime
+        if node_budget is not None and len(memo) >= node_budget:
+            raise OutOfTime
+        result = {}
+        for mine in (0, 1):
+            after = assign(need, member, left, i, mine)
+            if after is None:
+                continue
+            for k, (ways, counts) in search(i + 1, after).items():
+                total, total_counts = result.get(k + mine, (0, None))
+                counts = (ways * mine,) + counts
+                if total_counts is not None:
+                    counts = tuple(map(sum, zip(total_counts, counts)))
+                result[k + mine] = (total + ways, counts)
+        memo[i, need] = result
+        return result
+
+    ways = {}
+    counts = [{} for cell in cells]
+    for k, (total, by_cell) in search(0, need).items():
+        ways[k] = total
+        for i, count in enumerate(by_cell):
+            if count:
+                counts[i][k] = count
+    return ways, counts
+
+
+def sample_placement(cells, member, left, need):
+    """
+    Returns one random placement (a list of 0 or 1 per cell) satisfying
+    the sentence needs, found by backtracking in random value order.
+    """
+    placement = []
+    stack = [(need, random.sample((0, 1), 2))]
+    while stack:
+        need, options = stack[-1]
+        if len(stack) > len(cells):
+            return placement
+        if not options:
+            stack.pop()
+            if placement:
+                placement.pop()
+            continue
+        mine = options.pop()
+        after = assign(need, member, left, len(stack) - 1, mine)
+        if after is not None:
+            placement.append(mine)
+            stack.append((after, random.sample((0, 1), 2)))
+    raise ValueError("sentences are inconsistent")
+
+
+def combine(components):
+    """
+    Combines dicts mapping a number of mines to a number of ways
+    into the ways of placing mines over all of them.
+    """
+    total = {0: 1}
+    for ways in components:
+        product = {}
+        for i, a in total.items():
+            for j, b in ways.items():
+                product[i + j] = product.get(i + j, 0) + a * b
+        total = product
+    return total
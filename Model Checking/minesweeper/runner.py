@@ -37,17 +37,144 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+# Render number glyphs and button labels once
+numbers = [smallFont.render(str(n), True, BLACK) for n in range(9)]
+labels = {
+    text: mediumFont.render(text, True, BLACK)
+    for text in ["AI Move", "Reset", "Autoplay", "Stop"]
+}
+statuses = {
+    text: mediumFont.render(text, True, WHITE) for text in ["Lost", "Won", ""]
+}
+
+# Cell rectangles
+cells = [
+    [
+        pygame.Rect(
+            board_origin[0] + j * cell_size,
+            board_origin[1] + i * cell_size,
+            cell_size, cell_size
+        )
+        for j in range(WIDTH)
+    ]
+    for i in range(HEIGHT)
+]
+
+# Buttons
+button_width = (width / 3) - BOARD_PADDING * 2
+autoplayButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 120,
+    button_width, 50
+)
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    button_width, 50
+)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    button_width, 50
+)
+statusRect = pygame.Rect(0, 0, button_width, 50)
+statusRect.center = ((5 / 6) * width, (2 / 3) * height)
+
+# Frames per second, and the share of each frame autoplay may use for moves
+FPS = 60
+AUTOPLAY_SHARE = 0.8
+
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 flags = set()
 lost = False
 
+# Cells whose state changed since they were last drawn, whether the whole
+# screen must be redrawn, and the status text on screen
+dirty = set()
+redraw = True
+status = ""
+
+# Whether the AI keeps playing on its own
+autoplay = False
+
 # Show instructions initially
 instructions = True
+clock = pygame.time.Clock()
+
+
+def draw_cell(cell):
+    """
+    Draws a cell with its mine, flag or number, and returns its rectangle.
+    """
+    i, j = cell
+    rect = cells[i][j]
+    pygame.draw.rect(screen, GRAY, rect)
+    pygame.draw.rect(screen, WHITE, rect, 3)
+
+    # Add a mine, flag, or number if needed
+    if game.is_mine(cell) and lost:
+        screen.blit(mine, rect)
+    elif cell in flags:
+        screen.blit(flag, rect)
+    elif cell in revealed:
+        neighbors = numbers[game.nearby_mines(cell)]
+        screen.blit(neighbors, neighbors.get_rect(center=rect.center))
+    return rect
+
+
+def draw_button(button, text):
+    """
+    Draws a button with a label, and returns its rectangle.
+    """
+    pygame.draw.rect(screen, WHITE, button)
+    label = labels[text]
+    screen.blit(label, label.get_rect(center=button.center))
+    return button
+
+
+def draw_status(text):
+    """
+    Draws the status text over its area, and returns the area.
+    """
+    pygame.draw.rect(screen, BLACK, statusRect)
+    rendered = statuses[text]
+    screen.blit(rendered, rendered.get_rect(center=statusRect.center))
+    return statusRect
+
+
+def ai_move(verbose=True):
+    """
+    Returns the AI's next move, or None (flagging its mines) if it has none.
+    """
+    move = ai.make_safe_move()
+    if move is None:
+        move = ai.make_random_move()
+        if move is None:
+            dirty.update(flags ^ ai.mines)
+            flags.clear()
+            flags.update(ai.mines)
+        elif verbose:
+            print("No known safe moves, AI making random move.")
+    elif verbose:
+        print("AI making safe move.")
+    return move
+
+
+def reveal(move):
+    """
+    Reveals a cell and updates AI knowledge. Returns True if it was a mine.
+    """
+    if game.is_mine(move):
+        dirty.update(game.mines)
+        return True
+    nearby = game.nearby_mines(move)
+    revealed.add(move)
+    dirty.add(move)
+    ai.add_knowledge(move, nearby)
+    return False
+
 
 while True:
 
@@ -56,10 +183,9 @@ while True:
         if event.type == pygame.QUIT:
             sys.exit()
 
-    screen.fill(BLACK)
-
     # Show game instructions
     if instructions:
+        screen.fill(BLACK)
 
         # Title
         title = largeFont.render("Play Minesweeper", True, WHITE)
@@ -93,72 +219,13 @@ while True:
             mouse = pygame.mouse.get_pos()
             if buttonRect.collidepoint(mouse):
                 instructions = False
+                redraw = True
                 time.sleep(0.3)
 
         pygame.display.flip()
+        clock.tick(FPS)
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
-
     move = None
 
     left, _, right = pygame.mouse.get_pressed()
@@ -173,6 +240,7 @@ while True:
                         flags.remove((i, j))
                     else:
                         flags.add((i, j))
+                    dirty.add((i, j))
                     time.sleep(0.2)
 
     elif left == 1:
@@ -180,24 +248,24 @@ while True:
 
         # If AI button clicked, make an AI move
         if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
-                if move is None:
-                    flags = ai.mines.copy()
-                else:
-                    print("No known safe moves, AI making random move.")
-            else:
-                print("AI making safe move.")
+            move = ai_move()
+            time.sleep(0.2)
+
+        # Toggle autoplay
+        elif autoplayButton.collidepoint(mouse) and not lost:
+            autoplay = not autoplay
+            redraw = True
             time.sleep(0.2)
 
         # Reset game state
         elif resetButton.collidepoint(mouse):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
             revealed = set()
             flags = set()
             lost = False
+            autoplay = False
+            redraw = True
             time.sleep(0.2)
             continue
 
@@ -212,10 +280,50 @@ while True:
 
     # Make move and update AI knowledge
     if move:
-        if game.is_mine(move):
-            lost = True
-        else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
-    pygame.display.flip()
+        lost = reveal(move)
+
+    # Autoplay makes as many moves as fit in its share of the frame,
+    # and once every safe cell is revealed flags the rest
+    if autoplay:
+        deadline = time.perf_counter() + AUTOPLAY_SHARE / FPS
+        while not lost and time.perf_counter() < deadline:
+            if len(revealed) == HEIGHT * WIDTH - MINES:
+                move = None
+                hidden = {
+                    (i, j) for i in range(HEIGHT) for j in range(WIDTH)
+                } - revealed
+                dirty.update(flags ^ hidden)
+                flags.clear()
+                flags.update(hidden)
+            else:
+                move = ai_move(verbose=False)
+            if move is None:
+                break
+            lost = reveal(move)
+        if lost or move is None:
+            autoplay = False
+            redraw = True
+
+    # Draw everything after a reset or a change of screen,
+    # otherwise only the cells and text that changed
+    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    if redraw:
+        screen.fill(BLACK)
+        for i in range(HEIGHT):
+            for j in range(WIDTH):
+                draw_cell((i, j))
+        draw_button(autoplayButton, "Stop" if autoplay else "Autoplay")
+        draw_button(aiButton, "AI Move")
+        draw_button(resetButton, "Reset")
+        draw_status(text)
+        pygame.display.flip()
+    else:
+        rects = [draw_cell(cell) for cell in dirty]
+        if text != status:
+            rects.append(draw_status(text))
+        if rects:
+            pygame.display.update(rects)
+    dirty.clear()
+    redraw = False
+    status = text
+    clock.tick(FPS)
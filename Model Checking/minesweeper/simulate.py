@@ -0,0 +1,123 @@
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Games per board configuration, and the seed of the first game
+GAMES = 100
+SEED = 0
+
+# Board configurations: (height, width, mines)
+CONFIGS = [(8, 8, 8), (16, 16, 40), (16, 30, 99)]
+
+# Search nodes the AI's exact solver may visit before sampling; a node
+# budget rather than a time budget keeps seeded games replaying the same
+NODE_BUDGET = 20000
+
+# Percentiles reported for the time spent in add_knowledge per move
+PERCENTILES = [50, 90, 99]
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python simulate.py games [HEIGHTxWIDTH:MINES ...]")
+    games = int(sys.argv[1])
+    configs = [parse_config(arg) for arg in sys.argv[2:]] or CONFIGS
+
+    with multiprocessing.Pool() as pool:
+        for height, width, mines in configs:
+            tasks = [
+                (height, width, mines, SEED + i) for i in range(games)
+            ]
+            start = time.perf_counter()
+            results = pool.map(play, tasks, chunksize=max(1, games // 32))
+            elapsed = time.perf_counter() - start
+            report(f"{height}x{width}:{mines}", results, elapsed)
+
+
+def parse_config(arg):
+    """
+    Parses a board configuration such as 16x30:99 (a number of mines)
+    or 16x30:0.2 (a mine density) into (height, width, mines).
+    """
+    try:
+        size, mines = arg.split(":")
+        height, width = map(int, size.split("x"))
+        mines = float(mines)
+    except ValueError:
+        sys.exit(f"Invalid board configuration: {arg}")
+    if mines < 1:
+        mines = round(mines * height * width)
+    return height, width, int(mines)
+
+
+def play(task):
+    """
+    Plays one game with the AI, seeding the random number generator
+    so that the same task always plays the same game.
+
+    Returns a dict with whether the game was won, the number of moves
+    and the seconds spent in add_knowledge for each move.
+    """
+    height, width, mines, seed = task
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       time_budget=math.inf, node_budget=NODE_BUDGET)
+    times = []
+    won = False
+
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            break
+        nearby = game.nearby_mines(move)
+        start = time.perf_counter()
+        ai.add_knowledge(move, nearby)
+        times.append(time.perf_counter() - start)
+
+        # Every safe cell revealed
+        if len(ai.moves_made) == height * width - mines:
+            won = True
+            break
+
+    return {"won": won, "moves": len(times), "times": times}
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile (nearest rank) of sorted values.
+    """
+    if not values:
+        return 0
+    rank = max(1, -(-p * len(values) // 100))
+    return values[rank - 1]
+
+
+def report(name, results, elapsed):
+    """
+    Prints win rate, moves per game and add_knowledge time per move.
+    """
+    wins = sum(result["won"] for result in results)
+    moves = sorted(result["moves"] for result in results)
+    times = sorted(t for result in results for t in result["times"])
+    print(f"{name}: {len(results)} games in {elapsed:.2f}s")
+    print(f"  win rate: {wins / len(results):.1%}")
+    print(f"  moves per game: mean {sum(moves) / len(moves):.1f}, "
+          f"median {percentile(moves, 50)}, max {moves[-1]}")
+    if times:
+        summary = ", ".join(
+            f"p{p} {percentile(times, p) * 1e6:.0f}us" for p in PERCENTILES
+        )
+        print(f"  add_knowledge per move: mean "
+              f"{sum(times) / len(times) * 1e6:.0f}us, {summary}, "
+              f"max {times[-1] * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+import copy
+import math
+import pickle
+import random
 from unittest import TestCase
-from minesweeper import Sentence, MinesweeperAI, Minesweeper
+from minesweeper import Sentence, MinesweeperAI, Minesweeper, LinearSystem
+from simulate import parse_config, percentile, play
 
 
 class Test(TestCase):
@@ -44,6 +49,40 @@ class Test(TestCase):
         s6.mark_mine((0, 0))
         self.assertEqual({(0, 1), (1, 0), (1, 1)}, s6.known_safes(), "safes known when adding mines")
 
+    def test_sentence_bitboard(self):
+        s1 = Sentence({(2, 3), (2, 4)}, 1, width=10)
+        s2 = Sentence({(2, 3), (2, 4), (3, 3)}, 2, width=10)
+        self.assertEqual(2, len(s1))
+        self.assertIn((3, 3), s2)
+        self.assertNotIn((0, 0), s2)
+        self.assertTrue(s1.is_subset(s2))
+        self.assertFalse(s2.is_subset(s1))
+        self.assertFalse(s1.is_subset(s1), "strict subset")
+        self.assertEqual(Sentence({(3, 3)}, 1, width=10), s2.difference(s1))
+        with self.assertRaises(ValueError):
+            Sentence({(0, 10)}, 1, width=10)
+
+        # without a width, any cells fit, and other widths compare by cells
+        s3 = Sentence({(0, 9), (2, 3)}, 1)
+        self.assertEqual({(0, 9), (2, 3)}, s3.cells)
+        self.assertEqual(Sentence({(0, 9), (2, 3)}, 1, width=12), s3)
+        self.assertTrue(Sentence({(2, 3)}, 0, width=4).is_subset(s3))
+        self.assertEqual(Sentence({(0, 9)}, 0),
+                         s3.difference(Sentence({(2, 3)}, 1, width=10)))
+
+    def test_nearby_mines(self):
+        game = Minesweeper(height=5, width=6, mines=12)
+        for i in range(5):
+            for j in range(6):
+                expected = sum(
+                    (row, col) in game.mines
+                    for row in range(i - 1, i + 2)
+                    for col in range(j - 1, j + 2)
+                    if (row, col) != (i, j)
+                )
+                self.assertEqual(expected, game.nearby_mines((i, j)))
+                self.assertEqual((i, j) in game.mines, game.is_mine((i, j)))
+
     '''def test_minesweeper_ai(self):
         HEIGHT = 8
         WIDTH = 8
@@ -59,6 +98,147 @@ class Test(TestCase):
         safe_move = ai.make_safe_move()
         self.assertTrue(safe_move in safe_set)'''
 
+    def test_minesweeper_ai_index(self):
+        ai = MinesweeperAI(height=4, width=4)
+        ai.add_knowledge((0, 0), 1)
+        self.assertEqual({(0, 1), (1, 0), (1, 1)}, set(ai.index))
+
+        # marking a cell updates the sentences containing it, and
+        # whatever they then determine is marked as well
+        ai.mark_safe((0, 1))
+        ai.mark_safe((1, 1))
+        self.assertEqual({(1, 0)}, ai.mines)
+        self.assertEqual({}, ai.index)
+        self.assertEqual({}, ai.knowledge, "emptied sentences dropped")
+
+    def test_minesweeper_ai_probabilities(self):
+        ai = MinesweeperAI(height=3, width=3, mines=2)
+        ai.add_knowledge((0, 0), 1)
+        probabilities = ai.probabilities()
+        for cell in [(0, 1), (1, 0), (1, 1)]:
+            self.assertAlmostEqual(1 / 3, probabilities[cell])
+        for cell in [(0, 2), (1, 2), (2, 0), (2, 1), (2, 2)]:
+            self.assertAlmostEqual(1 / 5, probabilities[cell])
+        self.assertNotIn((0, 0), probabilities)
+        self.assertIn(ai.make_random_move(), {(0, 2), (1, 2), (2, 0), (2, 1), (2, 2)})
+
+        # past the node budget, seeded sampling gives the same estimates
+        estimates = []
+        for _ in range(2):
+            random.seed(0)
+            ai = MinesweeperAI(height=3, width=3, mines=2,
+                               time_budget=math.inf, node_budget=0)
+            ai.add_knowledge((0, 0), 1)
+            estimates.append(ai.probabilities())
+        self.assertEqual(estimates[0], estimates[1])
+        self.assertAlmostEqual(1, sum(estimates[0][cell] for cell in [(0, 1), (1, 0), (1, 1)]))
+
+    def test_minesweeper_ai_unknown(self):
+        ai = MinesweeperAI(height=2, width=2, mines=1)
+        ai.add_knowledge((0, 0), 1)
+        ai.mark_mine((1, 1))
+        self.assertEqual({(0, 1), (1, 0)}, set(ai.unknown))
+        self.assertIn(ai.make_random_move(), {(0, 1), (1, 0)})
+        ai.add_knowledge((0, 1), 1)
+        ai.add_knowledge((1, 0), 1)
+        self.assertEqual([], ai.unknown)
+        self.assertIsNone(ai.make_random_move(), "no cells left")
+
+    def test_minesweeper_ai_snapshot(self):
+        ai = MinesweeperAI(height=4, width=4, mines=2)
+        ai.add_knowledge((0, 0), 1)
+        snapshot = ai.snapshot()
+
+        # changes after the snapshot leave it untouched
+        ai.add_knowledge((0, 1), 1)
+        ai.mark_safe((1, 1))
+        self.assertEqual({(1, 0)}, ai.mines)
+        self.assertEqual(set(), snapshot.mines)
+        self.assertEqual({(0, 0)}, snapshot.moves_made)
+        self.assertEqual(
+            [Sentence({(0, 1), (1, 0), (1, 1)}, 1, width=4)],
+            list(snapshot.knowledge.values())
+        )
+
+        # the snapshot can be played on its own, and restored
+        snapshot.add_knowledge((1, 0), 1)
+        self.assertEqual({(0, 0), (1, 0)}, snapshot.moves_made)
+        ai.restore(snapshot)
+        self.assertEqual({(0, 0), (1, 0)}, ai.moves_made)
+        self.assertEqual(set(), ai.mines)
+
+    def test_minesweeper_ai_copy(self):
+        # copies made by deepcopy or pickle deduce as much as the original
+        for seed in range(4):
+            random.seed(seed)
+            game = Minesweeper(height=16, width=16, mines=40)
+            ai = MinesweeperAI(height=16, width=16, mines=40)
+            copied = ai
+            while True:
+                move = ai.make_safe_move() or ai.make_random_move()
+                if move is None or game.is_mine(move):
+                    break
+                nearby = game.nearby_mines(move)
+                ai.add_knowledge(move, nearby)
+                if seed % 2:
+                    copied = copy.deepcopy(copied)
+                else:
+                    copied = pickle.loads(pickle.dumps(copied))
+                copied.add_knowledge(move, nearby)
+                self.assertEqual(ai.mines, copied.mines)
+                self.assertEqual(ai.safes, copied.safes)
+
+    def test_linear_system(self):
+        # no sentence is a subset of another, but a = c and 2a + d = 2
+        a, b, c, d = (0, 0), (0, 1), (0, 2), (1, 0)
+        system = LinearSystem()
+        system.add({a, b}, 1)
+        system.add({b, c}, 1)
+        system.add({a, c, d}, 2)
+        marks = set()
+        new_marks = system.deductions()
+        while new_marks:
+            for cell, is_mine in set(new_marks) - marks:
+                marks.add((cell, is_mine))
+                system.assign(cell, int(is_mine))
+            new_marks = system.deductions()
+        self.assertEqual({(a, True), (b, False), (c, True), (d, False)}, marks)
+        self.assertEqual({}, system.rows)
+
+        # the column index matches the rows as cells are assigned
+        rng = random.Random(0)
+        for _ in range(200):
+            solution = [rng.random() < 0.3 for _ in range(12)]
+            system = LinearSystem()
+            for _ in range(8):
+                cells = rng.sample(range(12), rng.randint(2, 5))
+                system.add(cells, sum(solution[cell] for cell in cells))
+            for cell in rng.sample(range(12), 6):
+                system.assign(cell, int(solution[cell]))
+                columns = {}
+                for row_id, (coefficients, _) in system.rows.items():
+                    for other in coefficients:
+                        columns.setdefault(other, set()).add(row_id)
+                self.assertEqual(columns, {
+                    other: rows for other, rows in system.columns.items()
+                    if rows
+                })
+                self.assertNotIn(cell, columns)
+
+        with self.assertRaises(ValueError):
+            MinesweeperAI(inference="pairwise")
+
+    def test_simulate(self):
+        self.assertEqual((16, 30, 99), parse_config("16x30:99"))
+        self.assertEqual((10, 10, 20), parse_config("10x10:0.2"))
+        self.assertEqual(3, percentile([1, 2, 3, 4], 75))
+
+        # seeded games replay identically
+        result = play((8, 8, 8, 1))
+        self.assertEqual(result["moves"], len(result["times"]))
+        self.assertEqual(result["won"], play((8, 8, 8, 1))["won"])
+        self.assertEqual(result["moves"], play((8, 8, 8, 1))["moves"])
+
     def test_minesweeper_ai_script(self):
         HEIGHT = 4
         WIDTH = 4
@@ -67,7 +247,7 @@ class Test(TestCase):
         flags = set()
         lost = False
         game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-        ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+        ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
         game.print()
 
         while not lost:
@@ -75,7 +255,7 @@ class Test(TestCase):
             if move is None:
                 move = ai.make_random_move()
                 if move is None:
-                    pass
+                    break
                 else:
                     print("No known safe moves, AI making random move.")
             else:
@@ -50,6 +50,7 @@ knowledge.add(
     Symbol("MinervaGryffindor")
 )
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
+results = model_check_many(knowledge, symbols)
+for symbol, result in zip(symbols, results):
+    if result == YES:
         print(symbol)
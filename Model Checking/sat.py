@@ -0,0 +1,520 @@
+import heapq
+import math
+from collections import deque
+
+
+class Solver():
+    """
+    Conflict-driven clause-learning SAT solver.
+
+    Variables are positive integers and literals are non-zero integers,
+    where -v is the negation of v (the DIMACS convention).
+    Clauses are added with `add_clause` and decided with `solve`.
+    """
+
+    def __init__(self):
+
+        # False once the clause database is known to be unsatisfiable
+        self.ok = True
+
+        # Clauses given by the caller and clauses learned from conflicts
+        self.clauses = []
+        self.learnts = []
+
+        # Maps each literal to the clauses watching it
+        self.watches = {}
+
+        # Maps each assigned literal (and its negation) to a truth value
+        self.value = {}
+
+        # Per-variable decision level, reason clause, activity and phase
+        self.level = {}
+        self.reason = {}
+        self.activity = {}
+        self.phase = {}
+        self.num_vars = 0
+
+        # Assignment trail, split into decision levels by trail_lim
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+        # VSIDS order heap (lazy: stale entries are skipped on pop)
+        self.order = []
+        self.var_inc = 1.0
+        self.var_decay = 0.95
+
+        # Statistics
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+        # Satisfying assignment found by the last successful solve
+        self.model = None
+
+    def new_var(self):
+        """Creates a new variable and returns it."""
+        self.num_vars += 1
+        var = self.num_vars
+        self.watches[var] = []
+        self.watches[-var] = []
+        self.activity[var] = 0.0
+        self.phase[var] = False
+        heapq.heappush(self.order, (0.0, var))
+        return var
+
+    def ensure_vars(self, count):
+        """Makes sure variables 1..count exist."""
+        while self.num_vars < count:
+            self.new_var()
+
+    def add_clause(self, clause):
+        """
+        Adds a clause (an iterable of literals) to the solver.
+        Returns False if the database became unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self._backtrack(0)
+
+        # Remove duplicate and false literals, skip satisfied clauses
+        literals = []
+        for lit in clause:
+            self.ensure_vars(abs(lit))
+            value = self.value.get(lit)
+            if value is True or -lit in literals:
+                return True
+            if value is None and lit not in literals:
+                literals.append(lit)
+
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self._assign(literals[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._attach(literals)
+            self.clauses.append(literals)
+        return self.ok
+
+    def solve(self, assumptions=()):
+        """
+        Decides the clause database, with the given literals assumed true.
+        Returns True if satisfiable (storing the assignment in self.model),
+        otherwise False.
+
+        Clauses learned under assumptions remain valid without them,
+        so they are kept for later calls.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        for lit in assumptions:
+            self.ensure_vars(abs(lit))
+
+        restarts = 0
+        budget = 100 * luby(restarts)
+        conflicts = 0
+
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+
+                # Conflict without any decisions means unsatisfiable
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+
+                # Learn a clause and jump back to where it becomes unit
+                learnt, backjump = self._analyze(conflict)
+                self._backtrack(backjump)
+                if len(learnt) == 1:
+                    self._assign(learnt[0], None)
+                else:
+                    self._attach(learnt)
+                    self.learnts.append(learnt)
+                    self._assign(learnt[0], learnt)
+                self.var_inc /= self.var_decay
+
+            else:
+
+                # Restart according to the Luby sequence
+                if conflicts >= budget:
+                    restarts += 1
+                    budget = 100 * luby(restarts)
+                    conflicts = 0
+                    self._backtrack(0)
+                    continue
+
+                # Decide the assumptions first, one per decision level
+                lit = None
+                while len(self.trail_lim) < len(assumptions):
+                    p = assumptions[len(self.trail_lim)]
+                    if self.value.get(p) is False:
+                        self._backtrack(0)
+                        return False
+                    self.trail_lim.append(len(self.trail))
+                    if self.value.get(p) is None:
+                        lit = p
+                        break
+
+                # Otherwise pick the most active unassigned variable
+                if lit is None:
+                    var = self._pick_branch()
+                    if var is None:
+                        self.model = {
+                            v: self.value[v]
+                            for v in range(1, self.num_vars + 1)
+                        }
+                        self._backtrack(0)
+                        return True
+                    self.decisions += 1
+                    self.trail_lim.append(len(self.trail))
+                    lit = var if self.phase[var] else -var
+                self._assign(lit, None)
+
+    def _attach(self, clause):
+        """Watches the first two literals of a clause."""
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _assign(self, lit, reason):
+        var = abs(lit)
+        self.value[lit] = True
+        self.value[-lit] = False
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def _backtrack(self, level):
+        """Undoes all assignments above the given decision level."""
+        if len(self.trail_lim) <= level:
+            return
+        stop = self.trail_lim[level]
+        for lit in self.trail[stop:]:
+            var = abs(lit)
+            del self.value[lit]
+            del self.value[-lit]
+            self.phase[var] = lit > 0
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[stop:]
+        del self.trail_lim[level:]
+        self.qhead = min(self.qhead, stop)
+
+    def _propagate(self):
+        """
+        Performs unit propagation over the watched literals.
+        Returns a conflicting clause, or None.
+        """
+        value = self.value
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+
+            watchers = self.watches[false_lit]
+            kept = []
+            for index, clause in enumerate(watchers):
+
+                # Make sure the false literal is clause[1]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                # Clause already satisfied by the other watch
+                first = clause[0]
+                if value.get(first) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for a new literal to watch
+                for k in range(2, len(clause)):
+                    if value.get(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+
+                    # No replacement: clause is unit or conflicting
+                    kept.append(clause)
+                    if value.get(first) is False:
+                        kept.extend(watchers[index + 1:])
+                        self.watches[false_lit] = kept
+                        self.qhead = len(self.trail)
+                        return clause
+                    self._assign(first, clause)
+
+            self.watches[false_lit] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Derives a first-UIP clause from a conflict.
+        Returns the learned clause and the level to backjump to.
+        """
+        current = len(self.trail_lim)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        lit = None
+
+        while True:
+            for q in (clause if lit is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if self.level[var] == current:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+
+            # Walk back along the trail to the next literal to resolve on
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            seen.discard(abs(lit))
+            clause = self.reason[abs(lit)]
+            pending -= 1
+            if pending == 0:
+                break
+
+        learnt[0] = -lit
+
+        # Backjump to the second highest level in the learned clause
+        if len(learnt) == 1:
+            return learnt, 0
+        best = max(range(1, len(learnt)),
+                   key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def _bump(self, var):
+        """Increases the VSIDS activity of a variable."""
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            for v in self.activity:
+                self.activity[v] *= 1e-100
+            self.var_inc *= 1e-100
+            self.order = [(-self.activity[v], v) for v in self.activity
+                          if v not in self.value]
+            heapq.heapify(self.order)
+        elif var not in self.value:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def _pick_branch(self):
+        while self.order:
+            _, var = heapq.heappop(self.order)
+            if var not in self.value:
+                return var
+        for var in range(1, self.num_vars + 1):
+            if var not in self.value:
+                return var
+        return None
+
+
+def luby(i):
+    """Returns the i-th element (0-based) of the Luby restart sequence."""
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 2 ** seq
+
+
+class ModelCounter():
+    """
+    Exact model counter (#SAT) for clauses of integer literals.
+
+    Unit clauses are propagated, clauses that share no variables are
+    counted as independent components and multiplied, and the count of
+    every component is cached, so later counts over similar clauses
+    (for example with one extra unit clause) reuse most of the work.
+    """
+
+    def __init__(self):
+
+        # Maps a frozenset of clauses to its number of models
+        self.cache = {}
+
+    def count(self, clauses, variables):
+        """
+        Returns the number of assignments to variables that satisfy
+        every clause. Variables missing from the clauses are free.
+        """
+        clauses = frozenset(frozenset(clause) for clause in clauses)
+        free = set(variables) - variables_of(clauses)
+        return self._count(clauses) * 2 ** len(free)
+
+    def marginals(self, clauses, variables):
+        """
+        Returns the number of assignments to variables that satisfy every
+        clause, and a dict from each variable to the number of those
+        assignments in which it is true.
+
+        The clauses are simplified and split into components once, and
+        each variable only conditions the component it belongs to, so
+        the counts of the other components are reused.
+        """
+        variables = set(variables)
+        clauses = frozenset(frozenset(clause) for clause in clauses)
+        simplified = propagate(clauses)
+        if simplified is None:
+            return 0, dict.fromkeys(variables, 0)
+        clauses, assigned = simplified
+        parts = components(clauses)
+        counts = [self._count(part) for part in parts]
+        free = variables - variables_of(clauses)
+        free -= {abs(lit) for lit in assigned}
+        total = math.prod(counts) * 2 ** len(free)
+        if total == 0:
+            return 0, dict.fromkeys(variables, 0)
+
+        true = {abs(lit): total if lit > 0 else 0 for lit in assigned}
+        true.update(dict.fromkeys(free, total // 2))
+        for part, count in zip(parts, counts):
+            others = total // count
+            part_variables = variables_of(part)
+            for var in part_variables:
+                true[var] = others * self.count(
+                    part | {frozenset([var])}, part_variables
+                )
+        return total, true
+
+    def _count(self, clauses):
+        """Counts the assignments to the variables of clauses satisfying them."""
+        if not clauses:
+            return 1
+        if clauses in self.cache:
+            return self.cache[clauses]
+        key = clauses
+        variables = variables_of(clauses)
+
+        # Assign the literals forced by unit clauses
+        simplified = propagate(clauses)
+        if simplified is None:
+            self.cache[key] = 0
+            return 0
+        clauses, assigned = simplified
+
+        # Variables whose clauses were all satisfied are free
+        remaining = variables_of(clauses)
+        result = 2 ** (len(variables) - len(assigned) - len(remaining))
+
+        # Count independent components separately
+        parts = components(clauses)
+        if len(parts) > 1:
+            for part in parts:
+                result *= self._count(part)
+
+        # Otherwise branch on the most frequent variable
+        elif clauses:
+            occurrences = {}
+            for clause in clauses:
+                for lit in clause:
+                    occurrences[abs(lit)] = occurrences.get(abs(lit), 0) + 1
+            var = max(occurrences, key=occurrences.get)
+            total = 0
+            for lit in [var, -var]:
+                branch = condition(clauses, lit)
+                if branch is not None:
+                    free = len(remaining) - 1 - len(variables_of(branch))
+                    total += self._count(branch) * 2 ** free
+            result *= total
+
+        self.cache[key] = result
+        return result
+
+
+def variables_of(clauses):
+    """Returns the set of variables occurring in clauses."""
+    return {abs(lit) for clause in clauses for lit in clause}
+
+
+def propagate(clauses):
+    """
+    Simplifies clauses by unit propagation.
+    Returns the remaining clauses and the set of literals assigned,
+    or None if a clause is or becomes empty.
+    """
+    clauses = list(clauses)
+
+    # Maps each literal to the indices of the clauses containing it
+    occurrences = {}
+    for i, clause in enumerate(clauses):
+        if not clause:
+            return None
+        for lit in clause:
+            occurrences.setdefault(lit, []).append(i)
+
+    # Satisfied clauses are replaced by None
+    queue = deque(next(iter(clause)) for clause in clauses if len(clause) == 1)
+    assigned = set()
+    while queue:
+        lit = queue.popleft()
+        if lit in assigned:
+            continue
+        if -lit in assigned:
+            return None
+        assigned.add(lit)
+        for i in occurrences.get(lit, ()):
+            clauses[i] = None
+        for i in occurrences.get(-lit, ()):
+            if clauses[i] is None:
+                continue
+            clause = clauses[i] - {-lit}
+            if not clause:
+                return None
+            if len(clause) == 1:
+                queue.append(next(iter(clause)))
+            clauses[i] = clause
+    return frozenset(c for c in clauses if c is not None), assigned
+
+
+def condition(clauses, lit):
+    """
+    Simplifies clauses given that lit is true.
+    Returns None if a clause becomes empty.
+    """
+    result = set()
+    for clause in clauses:
+        if lit in clause:
+            continue
+        if -lit in clause:
+            clause = clause - {-lit}
+            if not clause:
+                return None
+        result.add(clause)
+    return frozenset(result)
+
+
+def components(clauses):
+    """Splits clauses into groups that share no variables."""
+
+    # Union-find over variables
+    parent = {}
+
+    def find(var):
+        while parent.setdefault(var, var) != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    for clause in clauses:
+        first = find(abs(next(iter(clause))))
+        for lit in clause:
+            parent[find(abs(lit))] = first
+
+    groups = {}
+    for clause in clauses:
+        root = find(abs(next(iter(clause))))
+        groups.setdefault(root, set()).add(clause)
+    return [frozenset(group) for group in groups.values()]
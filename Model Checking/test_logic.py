@@ -0,0 +1,238 @@
+import itertools
+import random
+from unittest import TestCase
+from logic import *
+from sat import ModelCounter
+
+
+class Test(TestCase):
+
+    def setUp(self):
+        rain = Symbol("rain")
+        hagrid = Symbol("hagrid")
+        dumbledore = Symbol("dumbledore")
+        self.symbols = [rain, hagrid, dumbledore]
+        self.knowledge = And(
+            Implication(Not(rain), hagrid),
+            Or(hagrid, dumbledore),
+            Not(And(hagrid, dumbledore)),
+            dumbledore
+        )
+
+    def test_cnf_structural_hashing(self):
+        a, b = Symbol("a"), Symbol("b")
+        cnf = CNF()
+        x = cnf.literal(Not(And(a, b)))
+        self.assertEqual({"a": 1, "b": 2}, cnf.variables)
+        self.assertEqual(-3, x)
+        self.assertEqual([[-3, 1], [-3, 2], [3, -1, -2]], cnf.clauses)
+
+        # Repeated and reordered subformulas reuse the same variable
+        self.assertEqual(3, cnf.literal(And(b, a)))
+        self.assertEqual(-3, cnf.literal(Or(Not(a), Not(b))))
+        self.assertEqual(3, len(cnf.clauses))
+        self.assertEqual(cnf.literal(Biconditional(a, b)),
+                         -cnf.literal(Biconditional(a, Not(b))))
+
+    def test_model_check_engines(self):
+        for engine in ["enumerate", "dpll", "sat", "vectorized"]:
+            rain, hagrid, dumbledore = self.symbols
+            self.assertTrue(model_check(self.knowledge, rain, engine=engine), engine)
+            self.assertTrue(model_check(self.knowledge, Not(hagrid), engine=engine), engine)
+            self.assertFalse(model_check(self.knowledge, hagrid, engine=engine), engine)
+
+    def test_model_check_sat_puzzle(self):
+        # Four people, four houses, 16 symbols: above the SAT threshold
+        people = ["Gilderoy", "Pomona", "Minerva", "Horace"]
+        houses = ["Gryffindor", "Hufflepuff", "Ravenclaw", "Slytherin"]
+        knowledge = And()
+        for person in people:
+            knowledge.add(Or(*[Symbol(f"{person}{house}") for house in houses]))
+            for h1 in houses:
+                for h2 in houses:
+                    if h1 != h2:
+                        knowledge.add(Implication(Symbol(f"{person}{h1}"),
+                                                  Not(Symbol(f"{person}{h2}"))))
+        for house in houses:
+            for p1 in people:
+                for p2 in people:
+                    if p1 != p2:
+                        knowledge.add(Implication(Symbol(f"{p1}{house}"),
+                                                  Not(Symbol(f"{p2}{house}"))))
+        knowledge.add(Or(Symbol("GilderoyGryffindor"), Symbol("GilderoyRavenclaw")))
+        knowledge.add(Not(Symbol("PomonaSlytherin")))
+        knowledge.add(Symbol("MinervaGryffindor"))
+
+        entailed = [symbol for symbol in
+                    [Symbol(f"{p}{h}") for p in people for h in houses]
+                    if model_check(knowledge, symbol)]
+        self.assertEqual(["GilderoyRavenclaw", "PomonaHufflepuff",
+                          "MinervaGryffindor", "HoraceSlytherin"],
+                         [symbol.name for symbol in entailed])
+
+    def test_compile(self):
+        a, b = Symbol("a"), Symbol("b")
+        sentences = [a, Not(a), And(a, b), Or(a, b), Implication(a, b),
+                     Biconditional(a, Not(b)), And(), Or()]
+        for sentence in sentences:
+            evaluate = sentence.compile(["a", "b"])
+            for bits in range(4):
+                model = {"a": bool(bits & 1), "b": bool(bits & 2)}
+                self.assertEqual(sentence.evaluate(model), bool(evaluate(bits)),
+                                 sentence)
+        with self.assertRaises(EvaluationException):
+            a.compile(["b"])
+
+        # Sentences too deep for Python's parser are evaluated instead
+        deep = a
+        for i in range(400):
+            deep = Implication(deep, b if i % 2 else a)
+        self.assertTrue(model_check(deep, deep, engine="enumerate"))
+        self.assertFalse(model_check(deep, Not(deep), engine="enumerate"))
+
+    def test_model_check_vectorized(self):
+        rain, hagrid, dumbledore = self.symbols
+        self.assertEqual((True, 1), model_check_vectorized(self.knowledge, rain))
+        self.assertEqual((False, 1), model_check_vectorized(self.knowledge, hagrid))
+
+        # Chunked enumeration gives the same count as a single chunk
+        a, b, c = Symbol("a"), Symbol("b"), Symbol("c")
+        knowledge = Or(a, And(b, c))
+        for chunk_bits in [0, 1, 3]:
+            self.assertEqual((False, 5), model_check_vectorized(
+                knowledge, a, chunk_bits=chunk_bits
+            ))
+        self.assertTrue(model_check(And(a, b), Or(a, c), engine="vectorized"))
+
+        # Sentences too deep for Python's parser are evaluated instead
+        deep = a
+        for i in range(400):
+            deep = Implication(deep, Or(b, c) if i % 2 else a)
+        self.assertTrue(model_check(deep, deep, engine="vectorized"))
+        models = sum(deep.evaluate({"a": bits & 1, "b": bits & 2, "c": bits & 4})
+                     for bits in range(8))
+        self.assertEqual((False, models), model_check_vectorized(deep, Not(deep)))
+
+    def test_model_check_many(self):
+        rain, hagrid, dumbledore = self.symbols
+        knowledge = And(Or(rain, hagrid), Not(dumbledore))
+        queries = [rain, hagrid, dumbledore, Or(rain, hagrid)]
+        for engine in ["enumerate", "sat"]:
+            self.assertEqual([MAYBE, MAYBE, NO, YES],
+                             model_check_many(knowledge, queries, engine=engine),
+                             engine)
+            self.assertEqual([YES, NO, YES],
+                             model_check_many(self.knowledge, self.symbols,
+                                              engine=engine),
+                             engine)
+
+    def test_incremental_kb(self):
+        rain, hagrid, dumbledore = self.symbols
+        knowledge = IncrementalKB(Implication(Not(rain), hagrid))
+        self.assertEqual(MAYBE, knowledge.check(rain))
+        knowledge.add(Or(hagrid, dumbledore))
+        knowledge.add(Not(And(hagrid, dumbledore)))
+        self.assertEqual([MAYBE, MAYBE], knowledge.check_many([rain, hagrid]))
+        knowledge.add(dumbledore)
+        self.assertTrue(knowledge.entails(rain))
+        self.assertEqual([YES, NO, YES], knowledge.check_many(self.symbols))
+        self.assertTrue(knowledge.consistent())
+
+        # Contradicting the knowledge makes everything entailed
+        knowledge.add(Not(rain))
+        self.assertFalse(knowledge.consistent())
+        self.assertEqual(YES, knowledge.check(hagrid))
+
+    def test_model_check_stats(self):
+        rain, hagrid, dumbledore = self.symbols
+        enumerate_stats, dpll_stats = {}, {}
+        self.assertTrue(model_check(self.knowledge, rain, engine="enumerate",
+                                    stats=enumerate_stats))
+        self.assertTrue(model_check(self.knowledge, rain, engine="dpll",
+                                    stats=dpll_stats))
+        self.assertEqual(8, enumerate_stats["nodes"])
+        self.assertEqual(1, dpll_stats["nodes"])
+
+    def test_hash_consing(self):
+        a, b = Symbol("a"), Symbol("b")
+        self.assertIs(Symbol("a"), a)
+        self.assertIs(Not(Or(a, b)), Not(Or(Symbol("a"), b)))
+        with self.assertRaises(AttributeError):
+            a.name = "b"
+
+        # Conjunctions can grow, and caches that depend on them follow
+        knowledge = And(a)
+        sentence = Not(knowledge)
+        self.assertIsNot(knowledge, And(a))
+        self.assertEqual({"a"}, sentence.symbols())
+        knowledge.add(Implication(b, Symbol("c")))
+        self.assertEqual({"a", "b", "c"}, sentence.symbols())
+        self.assertEqual(hash(Not(And(a, Implication(b, Symbol("c"))))),
+                         hash(sentence))
+
+        # Sentences over equal but distinct conjunctions stay distinct
+        k1, k2 = And(a), And(a)
+        o1, o2 = Or(Not(k1), b), Or(Not(k2), b)
+        self.assertIsNot(o1, o2)
+        self.assertIs(k2, o2.disjuncts[0].operand)
+        k2.add(Symbol("c"))
+        self.assertFalse(model_check(o2, Or(Not(a), b), engine="enumerate"))
+
+        # Hashing a deep sentence does not recurse deeply
+        deep = a
+        for i in range(2000):
+            deep = And(deep, b) if i % 2 else Or(deep, b)
+        self.assertEqual(hash(deep), hash(deep))
+
+    def test_count_models(self):
+        a, b, c = Symbol("a"), Symbol("b"), Symbol("c")
+        self.assertEqual(1, count_models(self.knowledge))
+        self.assertEqual(5, count_models(Or(a, And(b, c))))
+        self.assertEqual(0, count_models(And(a, Not(a))))
+        self.assertEqual(2, count_models(Or(a, Not(a))))
+
+        # Independent parts multiply
+        knowledge = And(Or(a, b), Biconditional(c, Symbol("d")))
+        self.assertEqual(6, count_models(knowledge))
+        self.assertEqual({"a": 2 / 3, "b": 2 / 3, "c": 1 / 2, "d": 1 / 2},
+                         marginals(knowledge))
+
+        # An empty clause has no models, and neither has its knowledge base
+        self.assertEqual(0, count_models(And(a, Or())))
+        with self.assertRaises(ValueError):
+            marginals(And(a, Not(a), Or(b, c)))
+
+    def test_count_models_random(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            variables = range(1, 9)
+            clauses = [
+                [v if rng.random() < 0.5 else -v
+                 for v in rng.sample(variables, rng.randint(1, 3))]
+                for _ in range(rng.randint(1, 20))
+            ]
+
+            # Brute-force enumeration of every assignment
+            models = [
+                values for values in itertools.product([False, True],
+                                                       repeat=len(variables))
+                if all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause)
+                       for clause in clauses)
+            ]
+            self.assertEqual(len(models),
+                             ModelCounter().count(clauses, variables), clauses)
+            total, true = ModelCounter().marginals(clauses, variables)
+            self.assertEqual(len(models), total, clauses)
+            for var in variables:
+                self.assertEqual(sum(values[var - 1] for values in models),
+                                 true[var], clauses)
+
+    def test_model_check_parallel(self):
+        rain, hagrid, dumbledore = self.symbols
+        for processes in [1, 2]:
+            stats = {}
+            self.assertTrue(model_check(self.knowledge, rain,
+                                        processes=processes, stats=stats))
+            self.assertEqual(8, stats["nodes"])
+            self.assertFalse(model_check(self.knowledge, hagrid,
+                                         processes=processes))
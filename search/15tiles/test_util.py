@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from util import Node, QueueFrontier, StackFrontier
+
+
+class Test(TestCase):
+
+    def setUp(self):
+        # States are unhashable lists of rows, so the frontiers key them
+        # by their state string
+        self.a = [[1, 2], [3, 0]]
+        self.b = [[1, 2], [0, 3]]
+
+    def test_stack_frontier(self):
+        frontier = StackFrontier()
+        for state in [self.a, self.b, [row[:] for row in self.a]]:
+            frontier.add(Node(state, None, None))
+        self.assertEqual(2, len(frontier.states))
+
+        # last in, first out, and a state stays while a copy is left
+        self.assertEqual(self.a, frontier.remove().state)
+        self.assertTrue(frontier.contains_state(self.a))
+        self.assertEqual(self.b, frontier.remove().state)
+        self.assertFalse(frontier.contains_state(self.b))
+        self.assertEqual(self.a, frontier.remove().state)
+        self.assertFalse(frontier.contains_state(self.a))
+        self.assertTrue(frontier.empty())
+        with self.assertRaises(Exception):
+            frontier.remove()
+
+    def test_queue_frontier(self):
+        frontier = QueueFrontier()
+        for state in [self.a, self.b, [row[:] for row in self.a]]:
+            frontier.add(Node(state, None, None))
+
+        # first in, first out
+        self.assertEqual(self.a, frontier.remove().state)
+        self.assertTrue(frontier.contains_state(self.a))
+        self.assertEqual(self.b, frontier.remove().state)
+        self.assertFalse(frontier.contains_state(self.b))
+        self.assertEqual(self.a, frontier.remove().state)
+        self.assertFalse(frontier.contains_state(self.a))
+        self.assertTrue(frontier.empty())
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node:
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,7 +10,7 @@ class Node:
         self.state_to_1d()  # 1d used to index and compare
 
     def state_to_str(self):
-        self.state_str = ','.join(str(num) for num in self.state)
+        self.state_str = state_to_str(self.state)
 
     def state_to_1d(self):
         size = (len(self.state), len(self.state[0]))
@@ -17,6 +20,10 @@ class Node:
             self.state_1d.append(self.state[idx // size[1]][idx % size[1]])
 
 
+def state_to_str(state):
+    return ','.join(str(num) for num in state)
+
+
 def print_tiles(state):
     print()
     for row in range(len(state)):
@@ -28,13 +35,17 @@ def print_tiles(state):
 
 class StackFrontier:
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Number of nodes in the frontier with each state, by state string
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state_str] = self.states.get(node.state_str, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state_to_str(state) in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -43,10 +54,16 @@ class StackFrontier:
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node)
             return node
 
+    def discard(self, node):
+        """Counts a node removed from the frontier out of self.states."""
+        count = self.states.pop(node.state_str)
+        if count > 1:
+            self.states[node.state_str] = count - 1
+
 
 class QueueFrontier(StackFrontier):
 
@@ -54,6 +71,6 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node)
             return node
@@ -1,55 +1,18 @@
-import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import Graph
 
-# Maps names to a set of corresponding person_ids
-names = {}
-
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
-
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+# People, movies and who starred in what, as a compact Graph
+graph = None
 
 
 def load_data(directory):
     """
-    Load data from CSV files into memory.
+    Load data from CSV files into memory, through the binary cache
+    kept next to them (see Graph.load).
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    global graph
+    graph = Graph.load(directory)
 
 
 def main():
@@ -69,7 +32,9 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    stats = {}
+    path = shortest_path(source, target, stats)
+    print(f"{stats['expanded']} people expanded.")
 
     if path is None:
         print("Not connected.")
@@ -78,57 +43,31 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person_names[graph.person(path[i][1])]
+            person2 = graph.person_names[graph.person(path[i + 1][1])]
+            movie = graph.movie_titles[graph.movie(path[i + 1][0])]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
-    """
-
-    # Initialize frontier to just the starting position
-    start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(start)
-
-    # Initialize an empty explored set
-    explored = set()
-
-    # Keep looping until solution found
-    while True:
-        # If nothing left in frontier, then no path
-        if frontier.empty():
-            return None
-        else:
-
-            # Choose a node from the frontier
-            node = frontier.remove()
-
-            # If node is the goal, then we have a solution
-            if node.state == target:
-                links = []
-                while node.parent is not None:
-                    links.append((node.action, node.state))
-                    node = node.parent
-                links.reverse()
-                return links
-
-            # Mark node as explored
-            explored.add(node.state)
-
-            # Add neighbors to frontier
-            neighbors = neighbors_for_person(node.state)
-            for neighbor in neighbors:
-                if not frontier.contains_state(neighbor[1]) and neighbor[1] not in explored:
-                    child = Node(state=neighbor[1], parent=node, action=neighbor[0])
-                    frontier.add(child)
 
+    The search runs on the graph's numbers (see Graph.shortest_path).
+    If stats is a dict, the number of people expanded is stored in
+    stats["expanded"].
+    """
+    path = graph.shortest_path(
+        graph.person(source), graph.person(target), stats)
+    if path is None:
+        return None
+    return [
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in path
+    ]
 
 
 def person_id_for_name(name):
@@ -136,15 +75,15 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = [graph.person_ids[p] for p in graph.people_named(name)]
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            person = graph.person(person_id)
+            name = graph.person_names[person]
+            birth = graph.person_births[person]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -162,11 +101,10 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie in graph.movies_of(graph.person(person_id)):
+        for person in graph.stars_of(movie):
+            neighbors.add((graph.movie_ids[movie], graph.person_ids[person]))
     return neighbors
 
 
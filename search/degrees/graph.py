@@ -0,0 +1,390 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+# Binary cache of a parsed dataset, kept in a directory next to its CSV
+# files; the version is bumped whenever the format changes
+CACHE = "graph.cache"
+CACHE_VERSION = 1
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+
+
+class Strings():
+    """
+    A list of strings stored as one UTF-8 byte array, where string i is
+    data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_list(cls, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.data[start:end].tobytes().decode("utf-8")
+
+
+class Graph():
+    """
+    Bipartite graph of people and the movies they starred in.
+
+    People and movies are numbered from 0, in order of their IMDb id
+    (compared as strings), so an id is found by binary search. Edges are
+    stored in compressed sparse row (CSR) form: the movies of person p are
+    person_movies[person_offsets[p]:person_offsets[p + 1]], and the stars
+    of movie m are movie_stars[movie_offsets[m]:movie_offsets[m + 1]].
+    by_name lists the people in order of their lowercase name.
+    """
+
+    # Arrays that make up a graph
+    ARRAYS = [
+        "person_offsets", "person_movies", "movie_offsets", "movie_stars",
+        "by_name",
+    ]
+    STRINGS = [
+        "person_ids", "person_names", "person_births",
+        "movie_ids", "movie_titles", "movie_years",
+    ]
+
+    def __init__(self, **fields):
+        for name in self.ARRAYS + self.STRINGS:
+            setattr(self, name, fields[name])
+        self.num_people = len(self.person_ids)
+        self.num_movies = len(self.movie_ids)
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Loads a graph from a directory of CSV files.
+
+        The parsed graph is cached as NumPy arrays in a directory next to
+        the CSV files, which later loads map into memory instead of parsing
+        the files again. The cache is rebuilt whenever the modification
+        time or size of a CSV file changes.
+        """
+        cache = os.path.join(directory, CACHE)
+        stamp = csv_stamp(directory)
+        graph = cls.from_cache(cache, stamp)
+        if graph is None:
+            graph = cls.from_csv(directory)
+            try:
+                graph.save(cache, stamp)
+            except OSError:
+                pass
+        return graph
+
+    @classmethod
+    def from_cache(cls, cache, stamp):
+        """
+        Maps a graph saved in a cache directory into memory.
+        Returns None if there is no cache, or it is stale or of another
+        version.
+        """
+        try:
+            with open(os.path.join(cache, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta != {"version": CACHE_VERSION, "files": stamp}:
+            return None
+
+        def array(name):
+            path = os.path.join(cache, f"{name}.npy")
+            return np.load(path, mmap_mode="r")
+
+        try:
+            fields = {name: array(name) for name in cls.ARRAYS}
+            for name in cls.STRINGS:
+                fields[name] = Strings(
+                    array(f"{name}.offsets"), array(f"{name}.data"))
+        except (OSError, ValueError):
+            return None
+        return cls(**fields)
+
+    def save(self, cache, stamp):
+        """
+        Saves the graph in a cache directory, stamped with the
+        modification times and sizes of the CSV files it was read from.
+        """
+        os.makedirs(cache, exist_ok=True)
+
+        # The metadata goes last, so that a partly written cache is stale
+        meta = os.path.join(cache, "meta.json")
+        if os.path.exists(meta):
+            os.remove(meta)
+        for name, array in self.arrays().items():
+            np.save(os.path.join(cache, f"{name}.npy"), array)
+        with open(f"{meta}.tmp", "w") as f:
+            json.dump({"version": CACHE_VERSION, "files": stamp}, f)
+        os.replace(f"{meta}.tmp", meta)
+
+    def arrays(self):
+        """Returns the arrays that make up the graph, by name."""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        for name in self.STRINGS:
+            strings = getattr(self, name)
+            arrays[f"{name}.offsets"] = strings.offsets
+            arrays[f"{name}.data"] = strings.data
+        return arrays
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Loads a graph from people.csv, movies.csv and stars.csv.
+        Stars that refer to an unknown person or movie are skipped.
+        """
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            people = sorted(
+                (row["id"], row["name"], row["birth"])
+                for row in csv.DictReader(f)
+            )
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            movies = sorted(
+                (row["id"], row["title"], row["year"])
+                for row in csv.DictReader(f)
+            )
+        person_index = {person[0]: i for i, person in enumerate(people)}
+        movie_index = {movie[0]: i for i, movie in enumerate(movies)}
+
+        # Read stars as pairs of numbers, dropping unknown and repeated ones
+        stars = set()
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person = person_index.get(row["person_id"])
+                movie = movie_index.get(row["movie_id"])
+                if person is not None and movie is not None:
+                    stars.add((person, movie))
+        stars = np.array(sorted(stars), dtype=np.int32).reshape(-1, 2)
+
+        fields = {}
+        fields["person_offsets"], fields["person_movies"] = csr(
+            stars[:, 0], stars[:, 1], len(people))
+        fields["movie_offsets"], fields["movie_stars"] = csr(
+            stars[:, 1], stars[:, 0], len(movies))
+        fields["by_name"] = np.array(
+            sorted(range(len(people)), key=lambda i: people[i][1].lower()),
+            dtype=np.int32
+        )
+        columns = [[person[k] for person in people] for k in range(3)]
+        columns += [[movie[k] for movie in movies] for k in range(3)]
+        for name, column in zip(cls.STRINGS, columns):
+            fields[name] = Strings.from_list(column)
+        return cls(**fields)
+
+    def person(self, person_id):
+        """Returns the number of the person with an IMDb id, or None."""
+        return find(self.person_ids, person_id)
+
+    def movie(self, movie_id):
+        """Returns the number of the movie with an IMDb id, or None."""
+        return find(self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """Returns the numbers of the people with a name (ignoring case)."""
+        name = name.lower()
+        names = KeyView(self.by_name, lambda p: self.person_names[p].lower())
+        i = lower_bound(names, name)
+        people = []
+        while i < len(names) and names[i] == name:
+            people.append(int(self.by_name[i]))
+            i += 1
+        return people
+
+    def movies_of(self, person):
+        """Returns the numbers of the movies a person starred in."""
+        start, end = self.person_offsets[person:person + 2]
+        return self.person_movies[start:end]
+
+    def stars_of(self, movie):
+        """Returns the numbers of the people starring in a movie."""
+        start, end = self.movie_offsets[movie:movie + 2]
+        return self.movie_stars[start:end]
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) pairs, as numbers,
+        that connect person source to person target, or None.
+
+        Searches breadth-first from both ends, a level at a time, always
+        expanding the smaller frontier. A level is expanded with array
+        operations over the CSR arrays rather than node by node, and the
+        search stops at the first level generating a person already
+        reached from the other end; any such person lies on a shortest
+        path. If stats is a dict, the number of people expanded is
+        stored in stats["expanded"].
+        """
+        if stats is not None:
+            stats["expanded"] = 0
+        if source == target:
+            return []
+
+        forward = Search(self, source)
+        backward = Search(self, target)
+        while len(forward.frontier) and len(backward.frontier):
+            if len(forward.frontier) <= len(backward.frontier):
+                search, other = forward, backward
+            else:
+                search, other = backward, forward
+            if stats is not None:
+                stats["expanded"] += len(search.frontier)
+            reached = search.expand()
+
+            # Goal test on generation: the two searches met
+            met = reached[other.reached[reached]]
+            if len(met):
+                person = int(met[0])
+                links = forward.path_to(person)
+                links.reverse()
+                return links + backward.path_to(person, forward=False)
+        return None
+
+    def bfs_tree(self, source):
+        """
+        Searches breadth-first from person source over the whole graph.
+        Returns the Search, whose path_to gives the path to any person.
+        """
+        search = Search(self, source)
+        while len(search.frontier):
+            search.expand()
+        return search
+
+
+class Search():
+    """
+    State of a breadth-first search from one person.
+
+    For every person reached, via_movie holds the movie it was reached
+    through, and for every movie reached, via_person holds the person it
+    was reached from. frontier holds the people of the last level.
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+        self.reached = np.zeros(graph.num_people, dtype=bool)
+        self.movie_reached = np.zeros(graph.num_movies, dtype=bool)
+        self.via_movie = np.empty(graph.num_people, dtype=np.int32)
+        self.via_person = np.empty(graph.num_movies, dtype=np.int32)
+        self.reached[source] = True
+        self.frontier = np.array([source], dtype=np.int32)
+
+    def expand(self):
+        """
+        Expands the frontier by one level, and returns the people reached.
+        """
+        graph = self.graph
+
+        # Movies of the frontier not reached before, each with a person
+        # of the frontier who starred in it
+        movies, people = gather(
+            graph.person_offsets, graph.person_movies, self.frontier)
+        new = ~self.movie_reached[movies]
+        movies, first = np.unique(movies[new], return_index=True)
+        self.movie_reached[movies] = True
+        self.via_person[movies] = people[new][first]
+
+        # Stars of those movies not reached before
+        stars, via = gather(graph.movie_offsets, graph.movie_stars, movies)
+        new = ~self.reached[stars]
+        stars, first = np.unique(stars[new], return_index=True)
+        self.reached[stars] = True
+        self.via_movie[stars] = via[new][first]
+
+        self.frontier = stars
+        return stars
+
+    def path_to(self, person, forward=True):
+        """
+        Returns the (movie, person) pairs from the source to a reached
+        person, in reverse order; with forward=False, the pairs leading
+        from the person to the source, in order.
+        """
+        links = []
+        while person != self.source:
+            movie = int(self.via_movie[person])
+            parent = int(self.via_person[movie])
+            links.append((movie, person if forward else parent))
+            person = parent
+        return links
+
+
+def csv_stamp(directory):
+    """
+    Returns the modification time and size of each CSV file of a dataset.
+    """
+    stamp = {}
+    for name in CSV_FILES:
+        info = os.stat(os.path.join(directory, name))
+        stamp[name] = [info.st_mtime_ns, info.st_size]
+    return stamp
+
+
+def csr(rows, columns, num_rows):
+    """
+    Returns (offsets, values) such that the columns of row r are
+    values[offsets[r]:offsets[r + 1]], given (row, column) pairs.
+    """
+    offsets = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=offsets[1:])
+    order = np.argsort(rows, kind="stable")
+    return offsets, columns[order].astype(np.int32)
+
+
+def gather(offsets, values, rows):
+    """
+    Returns the values of all the given rows of a CSR structure,
+    together with the row each value came from.
+    """
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    total = int(counts.sum())
+    ends = np.cumsum(counts)
+    index = np.arange(total) + np.repeat(starts - (ends - counts), counts)
+    return values[index], np.repeat(rows, counts)
+
+
+class KeyView():
+    """A sequence viewing key(item) for the items of another sequence."""
+
+    def __init__(self, items, key):
+        self.items = items
+        self.key = key
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.key(self.items[i])
+
+
+def lower_bound(sequence, value):
+    """Returns the first index in a sorted sequence whose item >= value."""
+    low, high = 0, len(sequence)
+    while low < high:
+        middle = (low + high) // 2
+        if sequence[middle] < value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def find(sequence, value):
+    """Returns the index of value in a sorted sequence, or None."""
+    i = lower_bound(sequence, value)
+    if i < len(sequence) and sequence[i] == value:
+        return i
+    return None
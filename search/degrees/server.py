@@ -0,0 +1,235 @@
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+import time
+from collections import OrderedDict
+
+from graph import Graph
+
+# Number of breadth-first search trees kept by a QueryServer
+TREES = 32
+
+# Pairs handed to a batch worker at a time
+CHUNK = 64
+
+# QueryServer of this process, inherited by batch workers through fork
+query_server = None
+
+
+def main():
+    usage = "Usage: python server.py directory [socket PATH | batch FILE]"
+    args = sys.argv[1:]
+    if len(args) not in (1, 3) or args[1:2] not in ([], ["socket"], ["batch"]):
+        sys.exit(usage)
+
+    global query_server
+    query_server = QueryServer(Graph.load(args[0]))
+    if len(args) == 1:
+        serve_stream(sys.stdin, sys.stdout)
+    elif args[1] == "socket":
+        serve_socket(args[2])
+    else:
+        batch(args[2], sys.stdout)
+
+
+class QueryError(Exception):
+    """Raised for a query that cannot be answered."""
+
+
+class QueryServer():
+    """
+    Answers queries for the shortest path between two people of a graph.
+
+    Keeps the breadth-first search trees of the sources queried most
+    recently, least recently used first. A tree takes far longer to
+    build than a single bidirectional search, so one is only built for
+    a source once the searches from it have taken as long as building
+    the last tree did.
+    """
+
+    def __init__(self, graph, size=TREES):
+        self.graph = graph
+        self.size = size
+
+        # Search trees, and seconds spent searching from sources without
+        # one, by source
+        self.trees = OrderedDict()
+        self.spent = OrderedDict()
+
+        # Seconds taken to build the last tree
+        self.tree_time = None
+
+    def handle(self, line):
+        """
+        Answers a query given as a line of JSON, such as
+        {"source": "Tom Hanks", "target": "Kevin Bacon"}.
+        """
+        try:
+            query = json.loads(line)
+            source, target = query["source"], query["target"]
+        except (ValueError, TypeError, KeyError):
+            return {"error": "Expected a JSON object with source and target"}
+        return self.answer(source, target)
+
+    def answer(self, source, target):
+        """
+        Returns the response to a query for the path between two people,
+        each given by name or IMDb id.
+        """
+        graph = self.graph
+        try:
+            source = self.resolve(source)
+            target = self.resolve(target)
+        except QueryError as error:
+            return {"error": str(error)}
+
+        path = self.path(source, target)
+        response = {
+            "source": graph.person_ids[source],
+            "target": graph.person_ids[target],
+            "degrees": None if path is None else len(path),
+            "path": None,
+        }
+        if path is not None:
+            response["path"] = [
+                {
+                    "movie_id": graph.movie_ids[movie],
+                    "title": graph.movie_titles[movie],
+                    "person_id": graph.person_ids[person],
+                    "name": graph.person_names[person],
+                }
+                for movie, person in path
+            ]
+        return response
+
+    def resolve(self, name):
+        """
+        Returns the number of the person with an IMDb id or a name.
+        Raises QueryError if there is no such person, or many.
+        """
+        graph = self.graph
+        if not isinstance(name, str):
+            raise QueryError(f"Expected a name: {name!r}")
+        person = graph.person(name)
+        if person is not None:
+            return person
+        people = graph.people_named(name)
+        if len(people) == 0:
+            raise QueryError(f"Person not found: {name}")
+        elif len(people) > 1:
+            ids = ", ".join(graph.person_ids[p] for p in people)
+            raise QueryError(f"Which '{name}'? IDs: {ids}")
+        return people[0]
+
+    def path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) pairs, as numbers,
+        that connect source to target, or None.
+        """
+
+        # A tree from either end has the path, as the graph is undirected
+        for person, other in [(source, target), (target, source)]:
+            tree = self.trees.get(person)
+            if tree is not None:
+                self.trees.move_to_end(person)
+                return path_in_tree(tree, other, forward=person == source)
+
+        spent = self.spent.pop(source, 0)
+        if spent and (self.tree_time is None or spent >= self.tree_time):
+            start = time.perf_counter()
+            tree = self.graph.bfs_tree(source)
+            self.tree_time = time.perf_counter() - start
+            self.trees[source] = tree
+            if len(self.trees) > self.size:
+                self.trees.popitem(last=False)
+            return path_in_tree(tree, target)
+
+        start = time.perf_counter()
+        path = self.graph.shortest_path(source, target)
+        self.spent[source] = spent + time.perf_counter() - start
+        if len(self.spent) > self.size:
+            self.spent.popitem(last=False)
+        return path
+
+
+def path_in_tree(tree, person, forward=True):
+    """
+    Returns the (movie, person) pairs from the source of a search tree to
+    a person, or with forward=False, from the person to the source.
+    Returns None if the person was not reached.
+    """
+    if not tree.reached[person]:
+        return None
+    links = tree.path_to(person, forward=forward)
+    if forward:
+        links.reverse()
+    return links
+
+
+def serve_stream(lines, out):
+    """Answers each line of JSON read from lines with a line written to out."""
+    for line in lines:
+        if line.strip():
+            out.write(json.dumps(query_server.handle(line)) + "\n")
+            out.flush()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Answers the lines of JSON sent over a socket connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                try:
+                    response = query_server.handle(line.decode("utf-8"))
+                except UnicodeDecodeError:
+                    response = {"error": "Expected a line of UTF-8 text"}
+                self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+def serve_socket(path):
+    """Answers queries sent to a Unix socket at path, until interrupted."""
+    if os.path.exists(path):
+        os.remove(path)
+    with socketserver.UnixStreamServer(path, Handler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def answer_pair(pair):
+    """Answers a query for a pair of names, in a batch worker."""
+    if len(pair) != 2:
+        return {"error": "Expected a tab-separated pair of names"}
+    return query_server.answer(*pair)
+
+
+def batch(filename, out):
+    """
+    Answers the tab-separated pairs of names in a file, one per line,
+    writing a line of JSON for each to out, in order.
+
+    The pairs are fanned out over worker processes forked from this one,
+    so the graph is shared rather than copied. Pairs are sorted by source
+    first, so that queries from the same source go to the same worker
+    and share its search trees.
+    """
+    with open(filename, encoding="utf-8") as f:
+        pairs = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+    order = sorted(range(len(pairs)), key=lambda i: pairs[i][0])
+
+    responses = [None] * len(pairs)
+    with multiprocessing.get_context("fork").Pool() as pool:
+        answers = pool.imap(
+            answer_pair, [pairs[i] for i in order], chunksize=CHUNK)
+        for i, response in zip(order, answers):
+            responses[i] = response
+    for response in responses:
+        out.write(json.dumps(response) + "\n")
+
+
+if __name__ == "__main__":
+    main()
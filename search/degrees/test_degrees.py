@@ -0,0 +1,308 @@
+import csv
+import io
+import itertools
+import json
+import os
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+from collections import deque
+from unittest import TestCase
+
+import numpy as np
+
+import degrees
+import server
+from graph import CACHE, CACHE_VERSION, Graph, csr, find, gather, lower_bound
+
+SMALL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+def copy_small(directory):
+    """Copies the CSV files of the small dataset into a directory."""
+    shutil.copytree(SMALL, directory, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns(CACHE))
+
+
+def read_neighbors(directory):
+    """
+    Reads a dataset into a dict from each person id to the set of
+    (movie_id, person_id) pairs of their co-stars, straight from the CSVs.
+    """
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        neighbors = {row["id"]: set() for row in csv.DictReader(f)}
+    stars = {}
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            stars.setdefault(row["movie_id"], set()).add(row["person_id"])
+    for movie_id, people in stars.items():
+        for person_id in people:
+            neighbors[person_id].update((movie_id, p) for p in people)
+    return neighbors
+
+
+def distance(neighbors, source, target):
+    """Returns the degrees between two people by a plain BFS, or None."""
+    depth = {source: 0}
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        if person_id == target:
+            return depth[person_id]
+        for _, other in neighbors[person_id]:
+            if other not in depth:
+                depth[other] = depth[person_id] + 1
+                queue.append(other)
+    return None
+
+
+class Test(TestCase):
+
+    def setUp(self):
+        degrees.graph = Graph.from_csv(SMALL)
+        self.neighbors = read_neighbors(SMALL)
+
+    def test_helpers(self):
+        values = [1, 3, 3, 7]
+        self.assertEqual(1, lower_bound(values, 3))
+        self.assertEqual(4, lower_bound(values, 8))
+        self.assertEqual(3, find(values, 7))
+        self.assertIsNone(find(values, 2))
+
+        # rows 0 and 2 of a CSR structure, with the row of each value
+        offsets, columns = csr(np.array([2, 0, 2, 1]),
+                               np.array([5, 6, 7, 8]), 3)
+        self.assertEqual([0, 1, 2, 4], offsets.tolist())
+        values, rows = gather(offsets, columns, np.array([0, 2]))
+        self.assertEqual([6, 5, 7], values.tolist())
+        self.assertEqual([0, 2, 2], rows.tolist())
+
+    def test_shortest_path(self):
+        for source, target in itertools.product(self.neighbors, repeat=2):
+            stats = {}
+            path = degrees.shortest_path(source, target, stats)
+            expected = distance(self.neighbors, source, target)
+            if source == target:
+                self.assertEqual(0, stats["expanded"])
+            if expected is None:
+                self.assertIsNone(path)
+                continue
+            self.assertEqual(expected, len(path), (source, target))
+            person_id = source
+            for link in path:
+                self.assertIn(link, self.neighbors[person_id])
+                person_id = link[1]
+            self.assertEqual(target, person_id)
+
+    def test_people_named(self):
+        self.assertEqual(["102"], [
+            degrees.graph.person_ids[p]
+            for p in degrees.graph.people_named("kEVIN bACON")
+        ])
+        self.assertEqual([], degrees.graph.people_named("Nobody"))
+        self.assertEqual("102", degrees.person_id_for_name("Kevin Bacon"))
+
+        # people sharing a name are all found
+        with tempfile.TemporaryDirectory() as directory:
+            copy_small(directory)
+            with open(f"{directory}/people.csv", "a", encoding="utf-8") as f:
+                f.write('5000,"Kevin Bacon",1970\n')
+            graph = Graph.from_csv(directory)
+        self.assertEqual({"102", "5000"}, {
+            graph.person_ids[p] for p in graph.people_named("kevin bacon")
+        })
+
+    def test_neighbors_for_person(self):
+        for person_id, neighbors in self.neighbors.items():
+            self.assertEqual(neighbors, degrees.neighbors_for_person(person_id))
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            copy_small(directory)
+            cache = os.path.join(directory, CACHE)
+            meta = os.path.join(cache, "meta.json")
+
+            def cached():
+                graph = Graph.load(directory)
+                path = graph.shortest_path(graph.person("102"),
+                                           graph.person("158"))
+                self.assertEqual(1, len(path))
+                return isinstance(graph.person_movies, np.memmap)
+
+            # the first load parses the CSV files, later ones map the cache
+            self.assertFalse(cached())
+            self.assertTrue(os.path.exists(meta))
+            self.assertTrue(cached())
+
+            # a CSV file with another modification time rebuilds it
+            info = os.stat(f"{directory}/stars.csv")
+            os.utime(f"{directory}/stars.csv",
+                     ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+            self.assertFalse(cached())
+            self.assertTrue(cached())
+
+            # and so does one of another size
+            info = os.stat(f"{directory}/people.csv")
+            with open(f"{directory}/people.csv", "a", encoding="utf-8") as f:
+                f.write('5000,"New Person",1970\n')
+            os.utime(f"{directory}/people.csv",
+                     ns=(info.st_atime_ns, info.st_mtime_ns))
+            self.assertFalse(cached())
+            self.assertTrue(cached())
+            self.assertEqual(1, len(
+                Graph.load(directory).people_named("new person")))
+
+            # a cache of another version is rebuilt
+            with open(meta) as f:
+                stamp = json.load(f)
+            stamp["version"] = CACHE_VERSION + 1
+            with open(meta, "w") as f:
+                json.dump(stamp, f)
+            self.assertFalse(cached())
+            self.assertTrue(cached())
+
+            # as is a partly written cache
+            os.remove(meta)
+            self.assertFalse(cached())
+            self.assertTrue(cached())
+            os.remove(os.path.join(cache, "by_name.npy"))
+            self.assertFalse(cached())
+            self.assertTrue(cached())
+
+    def test_cache_unwritable(self):
+        with tempfile.TemporaryDirectory() as directory:
+            copy_small(directory)
+
+            # with a file in the way of the cache, the CSV files are parsed
+            with open(os.path.join(directory, CACHE), "w"):
+                pass
+            for _ in range(2):
+                graph = Graph.load(directory)
+                self.assertNotIsInstance(graph.person_movies, np.memmap)
+                self.assertEqual(1, len(graph.people_named("Kevin Bacon")))
+            os.remove(os.path.join(directory, CACHE))
+
+            # and likewise in a read-only directory
+            os.chmod(directory, 0o555)
+            try:
+                if not os.access(directory, os.W_OK):
+                    graph = Graph.load(directory)
+                    self.assertEqual(1, len(graph.people_named("Kevin Bacon")))
+                    self.assertFalse(
+                        os.path.exists(os.path.join(directory, CACHE)))
+            finally:
+                os.chmod(directory, 0o755)
+
+    def assertValidResponse(self, response, source, target):
+        """Checks the path of a server response against a plain BFS."""
+        self.assertEqual((source, target),
+                         (response["source"], response["target"]))
+        self.assertEqual(distance(self.neighbors, source, target),
+                         response["degrees"])
+        if response["path"] is None:
+            return
+        person_id = source
+        for step in response["path"]:
+            link = (step["movie_id"], step["person_id"])
+            self.assertIn(link, self.neighbors[person_id])
+            person_id = step["person_id"]
+        self.assertEqual(target, person_id)
+
+    def test_query_server(self):
+        query_server = server.QueryServer(degrees.graph, size=1)
+        response = query_server.handle(
+            '{"source": "tom hanks", "target": "Kevin Bacon"}')
+        self.assertValidResponse(response, "158", "102")
+        self.assertEqual("Apollo 13", response["path"][0]["title"])
+        self.assertEqual("Kevin Bacon", response["path"][0]["name"])
+
+        # people can be given by IMDb id, and unconnected ones have no path
+        response = query_server.answer("158", "Emma Watson")
+        self.assertEqual((None, None),
+                         (response["degrees"], response["path"]))
+
+        for line in ["not json", "[]", '{"source": "Tom Hanks"}',
+                     '{"source": 158, "target": "102"}',
+                     '{"source": "Nobody", "target": "102"}']:
+            self.assertIn("error", query_server.handle(line), line)
+
+    def test_query_server_trees(self):
+        query_server = server.QueryServer(degrees.graph, size=1)
+        people = list(self.neighbors)
+        source = degrees.graph.person("158")
+
+        # a source queried again gets a search tree, used for paths from
+        # it and to it
+        query_server.answer("158", "102")
+        self.assertEqual([], list(query_server.trees))
+        for person_id in people:
+            self.assertValidResponse(
+                query_server.answer("158", person_id), "158", person_id)
+            self.assertEqual([source], list(query_server.trees))
+            self.assertValidResponse(
+                query_server.answer(person_id, "158"), person_id, "158")
+            self.assertEqual([source], list(query_server.trees))
+
+        # only the most recently used trees are kept
+        query_server.tree_time = 0
+        for _ in range(3):
+            query_server.answer("102", "200")
+        self.assertEqual([degrees.graph.person("102")],
+                         list(query_server.trees))
+
+    def test_query_server_ambiguous(self):
+        with tempfile.TemporaryDirectory() as directory:
+            copy_small(directory)
+            with open(f"{directory}/people.csv", "a", encoding="utf-8") as f:
+                f.write('5000,"Kevin Bacon",1970\n')
+            query_server = server.QueryServer(Graph.from_csv(directory))
+        response = query_server.answer("Kevin Bacon", "Tom Hanks")
+        self.assertIn("102", response["error"])
+        self.assertIn("5000", response["error"])
+        self.assertValidResponse(
+            query_server.answer("102", "Tom Hanks"), "102", "158")
+
+    def test_batch(self):
+        server.query_server = server.QueryServer(degrees.graph)
+        pairs = [("Tom Hanks", "Kevin Bacon"), ("Sally Field", "Tom Cruise"),
+                 ("Kevin Bacon", "Tom Hanks"), ("Tom Hanks", "Emma Watson")]
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "pairs.tsv")
+            with open(filename, "w", encoding="utf-8") as f:
+                for pair in pairs:
+                    f.write("\t".join(pair) + "\n")
+                f.write("Tom Hanks\n")
+            out = io.StringIO()
+            server.batch(filename, out)
+
+        # responses come in the order of the pairs
+        responses = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(pairs) + 1, len(responses))
+        for pair, response in zip(pairs, responses):
+            source, target = [degrees.person_id_for_name(p) for p in pair]
+            self.assertValidResponse(response, source, target)
+        self.assertIn("error", responses[-1])
+
+    def test_socket(self):
+        server.query_server = server.QueryServer(degrees.graph)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "degrees.sock")
+            with socketserver.UnixStreamServer(path, server.Handler) as unix:
+                thread = threading.Thread(target=unix.handle_request)
+                thread.start()
+                with socket.socket(socket.AF_UNIX) as client:
+                    client.connect(path)
+                    client.sendall(b"\xff\n" + json.dumps(
+                        {"source": "Tom Hanks", "target": "Kevin Bacon"}
+                    ).encode() + b"\n")
+                    client.shutdown(socket.SHUT_WR)
+                    lines = client.makefile().read().splitlines()
+                thread.join()
+
+        # a line that is not UTF-8 gets an error, and the connection
+        # goes on to answer the next one
+        self.assertEqual(2, len(lines))
+        self.assertIn("error", json.loads(lines[0]))
+        self.assertValidResponse(json.loads(lines[1]), "158", "102")
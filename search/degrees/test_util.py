@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from util import Node, QueueFrontier, StackFrontier
+
+
+class Test(TestCase):
+
+    def test_stack_frontier(self):
+        frontier = StackFrontier()
+        for state in ["a", "b", "a"]:
+            frontier.add(Node(state, None, None))
+        self.assertEqual(2, frontier.states["a"])
+
+        # last in, first out, and a state stays while a copy is left
+        self.assertEqual("a", frontier.remove().state)
+        self.assertTrue(frontier.contains_state("a"))
+        self.assertEqual("b", frontier.remove().state)
+        self.assertFalse(frontier.contains_state("b"))
+        self.assertEqual("a", frontier.remove().state)
+        self.assertFalse(frontier.contains_state("a"))
+        self.assertTrue(frontier.empty())
+        with self.assertRaises(Exception):
+            frontier.remove()
+
+    def test_queue_frontier(self):
+        frontier = QueueFrontier()
+        for state in ["a", "b", "a"]:
+            frontier.add(Node(state, None, None))
+
+        # first in, first out
+        self.assertEqual("a", frontier.remove().state)
+        self.assertTrue(frontier.contains_state("a"))
+        self.assertEqual("b", frontier.remove().state)
+        self.assertFalse(frontier.contains_state("b"))
+        self.assertEqual("a", frontier.remove().state)
+        self.assertFalse(frontier.contains_state("a"))
+        self.assertTrue(frontier.empty())
@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from maze import Node, QueueFrontier, StackFrontier
+
+
+class Test(TestCase):
+
+    def test_stack_frontier(self):
+        frontier = StackFrontier()
+        for state in [(0, 0), (0, 1), (0, 0)]:
+            frontier.add(Node(state, None, None))
+        self.assertEqual(2, frontier.states[(0, 0)])
+
+        # last in, first out, and a state stays while a copy is left
+        self.assertEqual((0, 0), frontier.remove().state)
+        self.assertTrue(frontier.contains_state((0, 0)))
+        self.assertEqual((0, 1), frontier.remove().state)
+        self.assertFalse(frontier.contains_state((0, 1)))
+        self.assertEqual((0, 0), frontier.remove().state)
+        self.assertFalse(frontier.contains_state((0, 0)))
+        self.assertTrue(frontier.empty())
+        with self.assertRaises(Exception):
+            frontier.remove()
+
+    def test_queue_frontier(self):
+        frontier = QueueFrontier()
+        for state in [(0, 0), (0, 1), (0, 0)]:
+            frontier.add(Node(state, None, None))
+
+        # first in, first out
+        self.assertEqual((0, 0), frontier.remove().state)
+        self.assertTrue(frontier.contains_state((0, 0)))
+        self.assertEqual((0, 1), frontier.remove().state)
+        self.assertFalse(frontier.contains_state((0, 1)))
+        self.assertEqual((0, 0), frontier.remove().state)
+        self.assertFalse(frontier.contains_state((0, 0)))
+        self.assertTrue(frontier.empty())